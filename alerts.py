@@ -0,0 +1,449 @@
+import bisect
+import json
+import logging
+import math
+import os
+import queue
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from urllib.parse import urlsplit
+
+import requests
+
+try:
+    import fcntl
+except ImportError:  # Windows: um único processo
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Métrica -> se é por moeda
+METRICS = {
+    'price': True,        # current_price
+    'change_24h': True,   # price_change_percentage_24h
+    'fear_greed': False   # valor do índice Fear & Greed
+}
+DIRECTIONS = ('above', 'below')
+
+
+class AlertRule:
+    """Regra de alerta: dispara quando a métrica cruza o limite na direção indicada"""
+
+    __slots__ = ('id', 'metric', 'coin', 'direction', 'threshold', 'webhook', 'created_at')
+
+    def __init__(self, rule_id, metric, coin, direction, threshold, webhook=None):
+        self.id = rule_id
+        self.metric = metric
+        self.coin = coin
+        self.direction = direction
+        self.threshold = threshold
+        self.webhook = webhook
+        self.created_at = time.time()
+
+    @property
+    def key(self):
+        return self.metric, self.coin, self.direction
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'metric': self.metric,
+            'coin': self.coin,
+            'direction': self.direction,
+            'threshold': self.threshold,
+            'webhook': self.webhook,
+            'created_at': self.created_at
+        }
+
+
+class ThresholdIndex:
+    """Limites de uma (métrica, moeda, direção) ordenados, para achar os cruzados por busca binária"""
+
+    __slots__ = ('thresholds', 'ids')
+
+    def __init__(self):
+        self.thresholds = []
+        self.ids = []
+
+    def add(self, threshold, rule_id):
+        i = bisect.bisect_right(self.thresholds, threshold)
+        self.thresholds.insert(i, threshold)
+        self.ids.insert(i, rule_id)
+
+    def remove(self, threshold, rule_id):
+        i = bisect.bisect_left(self.thresholds, threshold)
+        j = bisect.bisect_right(self.thresholds, threshold)
+        i += self.ids[i:j].index(rule_id)
+        del self.thresholds[i]
+        del self.ids[i]
+
+    def crossed(self, direction, previous, value):
+        """Ids das regras cujo limite foi cruzado entre previous e value"""
+        if direction == 'above' and value > previous:
+            # limite em (previous, value]
+            i = bisect.bisect_right(self.thresholds, previous)
+            j = bisect.bisect_right(self.thresholds, value)
+        elif direction == 'below' and value < previous:
+            # limite em [value, previous)
+            i = bisect.bisect_left(self.thresholds, value)
+            j = bisect.bisect_left(self.thresholds, previous)
+        else:
+            return []
+        return self.ids[i:j]
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class SharedLog:
+    """Arquivo JSONL só de anexação compartilhado entre os workers
+
+    Cada processo lê incrementalmente a partir do último offset, como o
+    índice de notícias. Escritas são feitas sob flock num arquivo .lock ao
+    lado do log; a compactação troca o arquivo por rename e os leitores
+    percebem pelo inode, relendo do início.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._offset = 0
+        self._inode = None
+
+    @contextmanager
+    def locked(self):
+        """Lock exclusivo entre processos para ler-alterar-gravar o log"""
+        if fcntl is None:  # Windows: um único processo
+            yield
+            return
+        fd = os.open(self.path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def read_new(self):
+        """(arquivo foi substituído, registros anexados desde a última leitura)"""
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return False, []
+        with f:
+            stat = os.fstat(f.fileno())
+            reset = stat.st_ino != self._inode or stat.st_size < self._offset
+            if reset:
+                self._inode, self._offset = stat.st_ino, 0
+            if stat.st_size <= self._offset:
+                return reset, []
+            f.seek(self._offset)
+            chunk = f.read(stat.st_size - self._offset)
+        complete = chunk.rfind(b'\n') + 1  # ignora linha parcial
+        self._offset += complete
+        return reset, [json.loads(line) for line in chunk[:complete].splitlines()]
+
+    def append(self, records):
+        """Anexa registros (chamado com locked())"""
+        with open(self.path, 'ab') as f:
+            f.write(encode_records(records))
+
+    def rewrite(self, records):
+        """Substitui o log pelos registros informados (chamado com locked())"""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix='.alerts-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(encode_records(records))
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+
+def encode_records(records):
+    return b''.join(json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n' for record in records)
+
+
+class AlertEngine:
+    """Avalia regras de alerta a cada nova geração do cache
+
+    As regras ficam em índices ordenados por (métrica, moeda, direção); cada
+    avaliação faz duas buscas binárias por índice, então o custo é
+    O(log n + disparados) e não depende do total de regras. Alertas
+    disparam quando o valor cruza o limite (não enquanto permanece além
+    dele) e vão para uma fila consultável por long-poll e, se a regra tiver
+    webhook, para uma thread de entrega.
+
+    Com rules_path/events_path, regras e alertas ficam em logs no diretório
+    compartilhado: qualquer worker registra, consulta ou remove regras (ids
+    alocados sob lock de arquivo), e só o atualizador eleito avalia e anexa
+    os alertas, que os demais workers leem do log.
+    """
+
+    def __init__(self, max_rules=200000, history=10000, webhook_hosts=('127.0.0.1', 'localhost', '::1'),
+                 rules_path=None, events_path=None):
+        self.max_rules = max_rules
+        self.history = history
+        self.webhook_hosts = set(webhook_hosts)
+        self.rules = {}
+        self._indexes = {}
+        self._last_values = {}  # (métrica, moeda) -> último valor observado
+        self._evaluated_version = None
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._events = deque(maxlen=history)
+        self.last_event_id = 0
+        self._rules_log = SharedLog(rules_path) if rules_path else None
+        self._events_log = SharedLog(events_path) if events_path else None
+        self._rule_records = 0
+        self._event_records = 0
+        self._webhooks = queue.Queue(maxsize=history)
+        self._delivery = None
+
+    def validate(self, spec):
+        """Normaliza a especificação de uma regra; levanta ValueError se inválida"""
+        metric = spec.get('metric')
+        if metric not in METRICS:
+            raise ValueError(f"Métrica inválida: {metric} (use {', '.join(METRICS)})")
+        direction = spec.get('direction')
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Direção inválida: {direction} (use above ou below)")
+        try:
+            threshold = float(spec['threshold'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("threshold deve ser numérico")
+        if not math.isfinite(threshold):
+            # NaN quebraria a ordenação do ThresholdIndex para todas as regras da mesma chave
+            raise ValueError("threshold deve ser finito")
+        coin = spec.get('coin') if METRICS[metric] else None
+        if METRICS[metric] and not isinstance(coin, str):
+            raise ValueError(f"A métrica {metric} exige coin")
+        webhook = spec.get('webhook')
+        if webhook is not None:
+            parts = urlsplit(str(webhook))
+            if parts.scheme not in ('http', 'https') or parts.hostname not in self.webhook_hosts:
+                raise ValueError(f"Webhook deve apontar para um destes hosts: {', '.join(sorted(self.webhook_hosts))}")
+        return metric, coin, direction, threshold, webhook
+
+    def _apply(self, record):
+        """Aplica um registro do log de regras ({'op': 'add'|'remove'|'next', ...})"""
+        rule_id = record['id']
+        if record['op'] == 'next':
+            # Gravado na compactação: ids de regras removidas nunca são reutilizados
+            self._next_id = max(self._next_id, rule_id)
+            return
+        if record['op'] == 'remove':
+            self._discard(rule_id)
+            return
+        if rule_id in self.rules:
+            return
+        rule = AlertRule(rule_id, record['metric'], record['coin'], record['direction'],
+                         record['threshold'], record['webhook'])
+        rule.created_at = record['created_at']
+        self.rules[rule_id] = rule
+        self._indexes.setdefault(rule.key, ThresholdIndex()).add(rule.threshold, rule_id)
+        self._next_id = max(self._next_id, rule_id + 1)
+
+    def _discard(self, rule_id):
+        rule = self.rules.pop(rule_id, None)
+        if rule is None:
+            return False
+        index = self._indexes[rule.key]
+        index.remove(rule.threshold, rule.id)
+        if not index:
+            del self._indexes[rule.key]
+        return True
+
+    def _sync_rules(self):
+        """Aplica as alterações de regras feitas por outros workers (chamado com self._lock)"""
+        if self._rules_log is None:
+            return
+        reset, records = self._rules_log.read_new()
+        if reset:
+            self.rules.clear()
+            self._indexes.clear()
+            self._rule_records = 0
+        for record in records:
+            self._apply(record)
+        self._rule_records += len(records)
+
+    def _write_rules(self, records):
+        """Anexa registros ao log (com o lock de arquivo) e compacta se o log cresceu demais"""
+        self._rules_log.append(records)
+        self._sync_rules()
+        if self._rule_records > 2 * len(self.rules) + 1000:
+            self._rules_log.rewrite([{'op': 'next', 'id': self._next_id}] +
+                                    [{'op': 'add', **rule.to_dict()} for rule in self.rules.values()])
+            self._sync_rules()
+
+    def add_many(self, specs):
+        """Registra várias regras de uma vez (todas ou nenhuma); retorna as regras criadas"""
+        normalized = [self.validate(spec) for spec in specs]
+        with self._lock, self._locked(self._rules_log):
+            self._sync_rules()
+            if len(self.rules) + len(normalized) > self.max_rules:
+                raise ValueError(f"Limite de {self.max_rules} regras atingido")
+            created_at = time.time()
+            records = [
+                {'op': 'add', 'id': self._next_id + i, 'metric': metric, 'coin': coin, 'direction': direction,
+                 'threshold': threshold, 'webhook': webhook, 'created_at': created_at}
+                for i, (metric, coin, direction, threshold, webhook) in enumerate(normalized)
+            ]
+            if self._rules_log is None:
+                for record in records:
+                    self._apply(record)
+            else:
+                self._write_rules(records)
+            return [self.rules[record['id']] for record in records]
+
+    def add(self, spec):
+        return self.add_many([spec])[0]
+
+    def get(self, rule_id):
+        with self._lock:
+            self._sync_rules()
+            return self.rules.get(rule_id)
+
+    def remove(self, rule_id):
+        with self._lock, self._locked(self._rules_log):
+            self._sync_rules()
+            if rule_id not in self.rules:
+                return False
+            if self._rules_log is None:
+                return self._discard(rule_id)
+            self._write_rules([{'op': 'remove', 'id': rule_id}])
+            return True
+
+    @staticmethod
+    def _locked(log):
+        return log.locked() if log is not None else nullcontext()
+
+    def evaluate(self, observations, version=None):
+        """Processa os valores atuais {(métrica, moeda): valor}; retorna os alertas disparados
+
+        Gerações com versão igual ou anterior à última avaliada são ignoradas
+        (threads publicando fora de ordem não disparam cruzamentos falsos).
+        """
+        fired = []
+        now = time.time()
+        with self._lock:
+            if version is not None:
+                if self._evaluated_version is not None and version <= self._evaluated_version:
+                    return []
+                self._evaluated_version = version
+            self._sync_rules()
+            for (metric, coin), value in observations.items():
+                if value is None:
+                    continue
+                previous = self._last_values.get((metric, coin))
+                self._last_values[(metric, coin)] = value
+                if previous is None or previous == value:
+                    continue
+                for direction in DIRECTIONS:
+                    index = self._indexes.get((metric, coin, direction))
+                    if index is None:
+                        continue
+                    for rule_id in index.crossed(direction, previous, value):
+                        fired.append((self.rules[rule_id], previous, value))
+
+        if not fired:
+            return []
+        with self._cond, self._locked(self._events_log):
+            self._sync_events()
+            events = [
+                {
+                    'id': self.last_event_id + i,
+                    'rule_id': rule.id,
+                    'metric': rule.metric,
+                    'coin': rule.coin,
+                    'direction': rule.direction,
+                    'threshold': rule.threshold,
+                    'previous': previous,
+                    'value': value,
+                    'fired_at': now
+                }
+                for i, (rule, previous, value) in enumerate(fired, 1)
+            ]
+            if self._events_log is None:
+                self._add_events(events)
+            else:
+                self._events_log.append(events)
+                self._sync_events()
+                if self._event_records > 2 * self.history:
+                    self._events_log.rewrite(list(self._events))
+                    self._sync_events()
+            for rule, event in zip((rule for rule, _, _ in fired), events):
+                if rule.webhook:
+                    self._enqueue_webhook(rule.webhook, event)
+        return events
+
+    def _add_events(self, events):
+        """Acrescenta alertas ao buffer e acorda o long-poll (chamado com self._cond)"""
+        new = [event for event in events if event['id'] > self.last_event_id]
+        if new:
+            self._events.extend(new)
+            self.last_event_id = new[-1]['id']
+            self._cond.notify_all()
+
+    def _sync_events(self):
+        """Lê os alertas anexados pelo atualizador (chamado com self._cond)"""
+        if self._events_log is None:
+            return
+        reset, records = self._events_log.read_new()
+        if reset:
+            self._events.clear()
+            self._event_records = 0
+            # O log compactado recomeça o buffer sem voltar a numeração
+            last_event_id, self.last_event_id = self.last_event_id, 0
+            self._add_events(records)
+            self.last_event_id = max(self.last_event_id, last_event_id)
+        else:
+            self._add_events(records)
+        self._event_records += len(records)
+
+    def sync(self):
+        """Relê regras e alertas gravados por outros workers (acorda o long-poll se houver alertas novos)"""
+        with self._lock:
+            self._sync_rules()
+        with self._cond:
+            self._sync_events()
+
+    def events_since(self, since, limit=1000):
+        with self._cond:
+            self._sync_events()
+            return [event for event in self._events if event['id'] > since][:limit]
+
+    def wait(self, since, timeout):
+        """Bloqueia até existir um alerta posterior a since ou esgotar o timeout"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.last_event_id > since, timeout)
+
+    def _enqueue_webhook(self, url, event):
+        if self._delivery is None:
+            self._delivery = threading.Thread(target=self._deliver_webhooks, daemon=True, name='alert-webhooks')
+            self._delivery.start()
+        try:
+            self._webhooks.put_nowait((url, event))
+        except queue.Full:
+            logger.warning(f"Fila de webhooks cheia; alerta {event['id']} não entregue em {url}")
+
+    def _deliver_webhooks(self):
+        session = requests.Session()
+        while True:
+            url, event = self._webhooks.get()
+            try:
+                session.post(url, data=json.dumps(event), headers={'Content-Type': 'application/json'}, timeout=5)
+            except Exception as e:
+                logger.error(f"Erro ao entregar alerta {event['id']} em {url}: {e}")
+
+    def status(self):
+        with self._lock:
+            self._sync_rules()
+            return {
+                'rules': len(self.rules),
+                'indexes': len(self._indexes),
+                'last_event_id': self.last_event_id,
+                'pending_webhooks': self._webhooks.qsize()
+            }
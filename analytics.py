@@ -0,0 +1,212 @@
+import math
+from collections import deque
+
+import numpy as np
+
+BUCKET = 3600  # Os indicadores usam fechamentos horários
+SMA_SHORT = 24
+SMA_LONG = 168
+RSI_PERIOD = 14
+VOLATILITY_WINDOW = 24
+CORRELATION_WINDOW = 168
+
+
+class RollingWindow:
+    """Janela deslizante com soma e soma dos quadrados mantidas em O(1)"""
+
+    def __init__(self, size):
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def seed(self, values):
+        self.values.extend(float(v) for v in values[-self.values.maxlen:])
+        tail = np.asarray(self.values, dtype=float)
+        self.total = float(tail.sum())
+        self.total_sq = float((tail * tail).sum())
+
+    def push(self, value):
+        if len(self.values) == self.values.maxlen:
+            old = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+
+    def replace_last(self, value):
+        old = self.values[-1]
+        self.values[-1] = value
+        self.total += value - old
+        self.total_sq += value * value - old * old
+
+    @property
+    def full(self):
+        return len(self.values) == self.values.maxlen
+
+    def mean(self):
+        return self.total / len(self.values) if self.values else None
+
+    def std(self):
+        n = len(self.values)
+        if n < 2:
+            return None
+        variance = (self.total_sq - self.total * self.total / n) / (n - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+def hourly_closes(timestamps, prices):
+    """Reamostra pontos brutos em fechamentos horários (último preço de cada hora), vetorizado"""
+    buckets = np.floor_divide(np.asarray(timestamps, dtype=float), BUCKET).astype(np.int64)
+    prices = np.asarray(prices, dtype=float)
+    last = np.flatnonzero(np.diff(buckets, append=buckets[-1] + 1))
+    return buckets[last], prices[last]
+
+
+class CoinIndicators:
+    """Indicadores de uma moeda atualizados incrementalmente a cada novo ponto
+
+    A hora corrente é um fechamento provisório: novos pontos da mesma hora
+    substituem o último valor das janelas em vez de recalculá-las.
+    """
+
+    def __init__(self, buckets, closes):
+        self.buckets = buckets[-(CORRELATION_WINDOW + 1):].tolist()
+        self.closes = closes[-(CORRELATION_WINDOW + 1):].tolist()
+        self.sma_short = RollingWindow(SMA_SHORT)
+        self.sma_long = RollingWindow(SMA_LONG)
+        self.gains = RollingWindow(RSI_PERIOD)
+        self.losses = RollingWindow(RSI_PERIOD)
+        self.returns = RollingWindow(VOLATILITY_WINDOW)
+
+        self.sma_short.seed(closes)
+        self.sma_long.seed(closes)
+        diffs = np.diff(closes)
+        self.gains.seed(np.clip(diffs, 0, None))
+        self.losses.seed(np.clip(-diffs, 0, None))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.returns.seed(np.nan_to_num(np.diff(np.log(closes)), posinf=0.0, neginf=0.0))
+
+        # Pico e drawdown máximo até a hora anterior (fechada)
+        peaks = np.maximum.accumulate(closes[:-1]) if len(closes) > 1 else np.array([])
+        self.closed_peak = float(peaks[-1]) if len(peaks) else 0.0
+        self.closed_max_drawdown = float(np.min(closes[:-1] / peaks - 1)) if len(peaks) else 0.0
+
+    def add(self, ts, price):
+        bucket = int(ts // BUCKET)
+        if bucket < self.buckets[-1]:
+            return
+        if bucket == self.buckets[-1]:
+            previous = self.closes[-2] if len(self.closes) > 1 else None
+            self.closes[-1] = price
+            self.sma_short.replace_last(price)
+            self.sma_long.replace_last(price)
+            if previous is not None:
+                diff = price - previous
+                self.gains.replace_last(max(diff, 0.0))
+                self.losses.replace_last(max(-diff, 0.0))
+                self.returns.replace_last(log_return(previous, price))
+            return
+
+        # Nova hora: a anterior passa a ser fechada
+        previous = self.closes[-1]
+        self.closed_peak = max(self.closed_peak, previous)
+        self.closed_max_drawdown = min(self.closed_max_drawdown, previous / self.closed_peak - 1)
+        self.buckets.append(bucket)
+        self.closes.append(price)
+        if len(self.closes) > CORRELATION_WINDOW + 1:
+            del self.buckets[0], self.closes[0]
+
+        diff = price - previous
+        self.sma_short.push(price)
+        self.sma_long.push(price)
+        self.gains.push(max(diff, 0.0))
+        self.losses.push(max(-diff, 0.0))
+        self.returns.push(log_return(previous, price))
+
+    def summary(self):
+        price = self.closes[-1]
+        peak = max(self.closed_peak, price)
+        drawdown = price / peak - 1 if peak else 0.0
+        loss = self.losses.total
+        if not self.gains.full:
+            rsi = None
+        elif loss <= 0:
+            rsi = 100.0
+        else:
+            rsi = 100 - 100 / (1 + self.gains.total / loss)
+        volatility = self.returns.std()
+
+        return {
+            'price': price,
+            'sma_24h': round_or_none(self.sma_short.mean() if self.sma_short.full else None),
+            'sma_7d': round_or_none(self.sma_long.mean() if self.sma_long.full else None),
+            'rsi_14h': round_or_none(rsi, 2),
+            'volatility_24h': round_or_none(volatility * math.sqrt(VOLATILITY_WINDOW) if volatility else None, 6),
+            'drawdown': round(drawdown, 6),
+            'max_drawdown': round(min(self.closed_max_drawdown, drawdown), 6)
+        }
+
+
+class MarketAnalytics:
+    """Indicadores técnicos e correlação calculados sobre o histórico de preços"""
+
+    def __init__(self, history):
+        self.history = history
+        self.coins = {}
+        self._processed = {}  # moeda -> quantidade de pontos brutos já consumidos
+
+    def _update_coin(self, coin):
+        series = self.history.series(coin)
+        count = len(series.timestamps)
+        done = self._processed.get(coin, 0)
+        if count == done:
+            return
+        if coin not in self.coins:
+            if count < 2:
+                return
+            buckets, closes = hourly_closes(series.timestamps, series.prices)
+            self.coins[coin] = CoinIndicators(buckets, closes)
+        else:
+            indicators = self.coins[coin]
+            for ts, price in zip(series.timestamps[done:count], series.prices[done:count]):
+                indicators.add(ts, price)
+        self._processed[coin] = count
+
+    def correlation(self):
+        """Matriz de correlação dos retornos horários, alinhados pelas horas em comum"""
+        coins = [coin for coin, ind in self.coins.items() if len(ind.closes) > 2]
+        if len(coins) < 2:
+            return {'coins': coins, 'matrix': []}
+
+        common = set.intersection(*(set(self.coins[coin].buckets) for coin in coins))
+        hours = np.array(sorted(common), dtype=np.int64)[-(CORRELATION_WINDOW + 1):]
+        if len(hours) < 3:
+            return {'coins': coins, 'matrix': []}
+
+        closes = np.empty((len(coins), len(hours)))
+        for row, coin in enumerate(coins):
+            ind = self.coins[coin]
+            buckets = np.asarray(ind.buckets, dtype=np.int64)
+            closes[row] = np.asarray(ind.closes)[np.searchsorted(buckets, hours)]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            returns = np.nan_to_num(np.diff(np.log(closes), axis=1), posinf=0.0, neginf=0.0)
+            matrix = np.nan_to_num(np.corrcoef(returns))
+        return {'coins': coins, 'matrix': np.round(matrix, 4).tolist()}
+
+    def compute(self, coins):
+        """Atualiza os indicadores com os pontos novos e retorna o resumo"""
+        for coin in coins:
+            self._update_coin(coin)
+        return {
+            'coins': {coin: self.coins[coin].summary() for coin in coins if coin in self.coins},
+            'correlation': self.correlation()
+        }
+
+
+def log_return(previous, price):
+    return math.log(price / previous) if previous > 0 and price > 0 else 0.0
+
+
+def round_or_none(value, digits=8):
+    return None if value is None else round(value, digits)
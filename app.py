@@ -1,13 +1,34 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request, Response, g
 from flask_cors import CORS
-import requests
 from datetime import datetime
 import json
+import os
+import re
 import time
 import threading
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import lru_cache
 import logging
 import xml.etree.ElementTree as ET
+from scheduler import RefreshScheduler
+from snapshot import Snapshot, FORMATS
+from cache_store import CacheStore
+from push import DeltaBroadcaster, compute_delta
+from shared_cache import UpdaterElection, FileSnapshotStore
+from persistence import SourceStore
+from history import PriceHistory
+from analytics import MarketAnalytics
+from news_index import NewsIndex, published_timestamp
+from registry import SourceRegistry, id_batches
+from upstream import UpstreamGovernor, SharedUpstreamGovernor, UpstreamUnavailable
+from transport import HTTPTransport, parse_overrides
+from ondemand import CoinBatcher
+from tickers import load_tickers
+from metrics import MetricsRegistry, SIZE_BUCKETS
+from alerts import AlertEngine
+from defi import DefiIndex, TopProtocols, iter_json_array
+from currency import BASE_CURRENCY, currency_rate, convert_tickers, convert_global_metrics
 
 app = Flask(__name__)
 CORS(app)
@@ -16,8 +37,8 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Cache global para dados
-cache = {
+# Cache global para dados (gerações imutáveis publicadas atomicamente)
+cache = CacheStore({
     'tickers': {},
     'news': [],
     'fear_greed': {},
@@ -25,43 +46,213 @@ cache = {
     'trending': [],
     'exchanges': [],
     'defi_protocols': [],
-    'last_update': {}
-}
+    'last_update': {'stale': True}
+})
 
 # Configurações
-COINGECKO_COINS = ['bitcoin', 'ethereum', 'ripple', 'dogecoin', 'solana', 'cardano', 'polkadot', 'polygon']
+# Fetchers de grupos de moedas e parsers de feeds disponíveis para o arquivo de fontes
+COIN_FETCHERS = {'coingecko_markets': 'fetch_markets_page'}
+FEED_PARSERS = {'rss': 'parse_rss_feed'}
+
+# Grupos de moedas e feeds de notícias (sources.json)
+SOURCES_FILE = os.environ.get('CRYPTO_SOURCES_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sources.json'))
+registry = SourceRegistry.load(SOURCES_FILE, COIN_FETCHERS, FEED_PARSERS)
+COINGECKO_COINS = registry.coin_ids()
+
+# Fontes de dados: chave do cache -> método do agregador
+DATA_SOURCES = {
+    'coingecko_data': 'get_coingecko_data',
+    'global_metrics': 'get_global_crypto_stats',
+    'fear_greed': 'get_fear_greed_index',
+    'trending': 'get_trending_coins',
+    'exchange_rates': 'get_exchange_rates',
+    'news': 'get_crypto_news',
+    'defi_protocols': 'get_defi_protocols'
+}
+CACHE_UPDATE_DEADLINE = 30  # Prazo total (segundos) de um ciclo de atualização
+
+# Host principal de cada fonte (circuito aberto => a fonte nem é consultada)
+SOURCE_HOSTS = {
+    'coingecko_data': 'api.coingecko.com',
+    'global_metrics': 'api.coingecko.com',
+    'fear_greed': 'api.alternative.me',
+    'trending': 'api.coingecko.com',
+    'exchange_rates': 'api.exchangerate-api.com',
+    'defi_protocols': 'api.llama.fi'
+}
+
+# Rate limit local por host: (requisições por segundo, rajada)
+UPSTREAM_LIMITS = {
+    'api.coingecko.com': (0.4, 4),  # Plano gratuito: ~30 chamadas/minuto, divididas com as buscas sob demanda
+    'api.alternative.me': (1, 5),
+    'api.exchangerate-api.com': (1, 5),
+    'api.llama.fi': (2, 5)
+}
+governor = UpstreamGovernor(UPSTREAM_LIMITS)
+
+# Buscas sob demanda (/api/tickers/<moeda>) têm orçamento e circuito próprios: ids aleatórios
+# esgotam só este limite, nunca o do atualizador. Todos os workers atendem essas buscas, então
+# o orçamento é um só, dividido entre eles (ondemand_governor, criado junto com DATA_DIR)
+ONDEMAND_LIMITS = {'api.coingecko.com': (0.1, 1)}
+
+# Redireciona hosts externos para outro servidor (ex.: stub dos benchmarks): "host=url,*=url"
+UPSTREAM_OVERRIDES = parse_overrides(os.environ.get('CRYPTO_UPSTREAM_OVERRIDES', ''))
+
+# Intervalo de atualização (segundos) de cada fonte
+SOURCE_INTERVALS = {
+    'coingecko_data': registry.min_interval(registry.coin_groups, 60),
+    'global_metrics': 300,
+    'fear_greed': 3600,
+    'trending': 600,
+    'exchange_rates': 3600,
+    'news': registry.min_interval(registry.feeds, 300),
+    'defi_protocols': 1800
+}
+
+STALE_AFTER_INTERVALS = 2  # Seção sem atualização por mais que N intervalos é marcada como stale
+
+# Diretório compartilhado entre os workers (eleição do atualizador e snapshot do cache)
+DATA_DIR = os.environ.get('CRYPTO_DASHBOARD_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+SHARED_POLL_INTERVAL = 1  # Segundos entre verificações do snapshot compartilhado
+ondemand_governor = SharedUpstreamGovernor(os.path.join(DATA_DIR, 'ondemand_budget.json'), ONDEMAND_LIMITS,
+                                           default_limit=(0.1, 1), max_wait=2)
+HISTORY_MAX_POINTS = 2000  # Máximo de pontos por consulta em /api/history
+COIN_ID_PATTERN = re.compile(r'^[a-z0-9-]{1,64}$')
+
+# Histórico local de preços (substitui o download do sparkline a cada ciclo)
+price_history = PriceHistory(os.path.join(DATA_DIR, 'history'))
+market_analytics = MarketAnalytics(price_history)
+
+# Índice persistente de notícias (busca e paginação em /api/news)
+news_index = NewsIndex(os.path.join(DATA_DIR, 'news.jsonl'))
+threading.Thread(target=news_index.load, daemon=True).start()
+NEWS_PAGE_MAX = 100
+
+# Índice de protocolos DeFi por chain/categoria (/api/defi), montado em streaming a cada atualização
+defi_index = DefiIndex(os.path.join(DATA_DIR, 'defi_index.json'))
+DEFI_INDEX_DEPTH = 50  # Protocolos guardados por chain, categoria e par (máximo de ?limit=)
+DEFI_CACHE_SIZE = 10  # Protocolos na seção do dashboard
+DEFI_CHUNK_SIZE = 64 * 1024
+NEWS_CACHE_SIZE = 10  # Notícias mantidas no cache/snapshot do dashboard
+
+# Métricas expostas em /metrics (contadores por thread, somados só na leitura)
+metrics = MetricsRegistry()
+source_fetch_seconds = metrics.histogram(
+    'crypto_source_fetch_seconds', 'Duração da busca de cada fonte de dados', ('source',))
+source_fetches = metrics.counter(
+    'crypto_source_fetches_total', 'Buscas de cada fonte por resultado (success, empty, unchanged, error, skipped)',
+    ('source', 'result'))
+upstream_response_bytes = metrics.histogram(
+    'crypto_upstream_response_bytes', 'Tamanho das respostas das APIs externas', ('host',), SIZE_BUCKETS)
+update_cycle_seconds = metrics.histogram(
+    'crypto_update_cycle_seconds', 'Duração de um ciclo completo de update_cache()')
+request_seconds = metrics.histogram(
+    'crypto_http_request_seconds', 'Latência das requisições por rota', ('route',))
+requests_total = metrics.counter(
+    'crypto_http_requests_total', 'Requisições por rota e status HTTP', ('route', 'status'))
+alerts_fired = metrics.counter('crypto_alerts_fired_total', 'Alertas de preço disparados', ('metric',))
+
+# Alertas avaliados pelo atualizador a cada nova geração do cache (webhooks só para os hosts listados)
+ALERT_WEBHOOK_HOSTS = os.environ.get('CRYPTO_ALERT_WEBHOOK_HOSTS', '127.0.0.1,localhost,::1').split(',')
+ALERT_WAIT_MAX = 30  # Segundos máximos de long-poll em /api/alerts/events
+alert_engine = AlertEngine(
+    webhook_hosts=[host.strip() for host in ALERT_WEBHOOK_HOSTS if host.strip()],
+    rules_path=os.path.join(DATA_DIR, 'alert_rules.jsonl'),
+    events_path=os.path.join(DATA_DIR, 'alert_events.jsonl')
+)
+
+# SSE e long-poll no WSGI prendem uma thread por cliente: só com servidor que aguenta
+# (gevent, servidor do Flask); o asgi.py atende os dois no event loop
+SSE_ENABLED = os.environ.get('CRYPTO_DASHBOARD_SSE') == '1'
 
 class CryptoDataAggregator:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        # Pool de conexões keep-alive por host, compartilhado pelos fetches concorrentes
+        self.transport = HTTPTransport(pool_size=registry.feed_concurrency, headers={
             'User-Agent': 'CryptoDashboard/1.0'
-        })
+        }, overrides=UPSTREAM_OVERRIDES)
+        # Estado do GET condicional e últimos itens de cada feed RSS
+        self.feed_validators = {}
+        self.feed_items = {}
+        # Último ticker de cada moeda (grupos não vencidos reaproveitam o valor anterior)
+        self.coin_results = {}
+        # Concorrência limitada para páginas do CoinGecko e feeds
+        self.fetch_executor = ThreadPoolExecutor(max_workers=registry.feed_concurrency, thread_name_prefix='fetch')
 
-    def get_coingecko_data(self):
-        """Busca dados do CoinGecko"""
+    def get(self, url, limiter=None, **kwargs):
+        """GET com rate limit local e circuit breaker por host (do atualizador, salvo outro limiter)"""
+        limiter = limiter or governor
+        host = limiter.acquire(url)
         try:
-            url = "https://api.coingecko.com/api/v3/coins/markets"
-            params = {
-                'vs_currency': 'usd',
-                'ids': ','.join(COINGECKO_COINS),
-                'order': 'market_cap_desc',
-                'per_page': 100,
-                'page': 1,
-                'sparkline': True,
-                'price_change_percentage': '1h,24h,7d,30d'
-            }
-            response = self.session.get(url, params=params, timeout=10)
-            return response.json() if response.status_code == 200 else []
+            response = self.transport.get(url, **kwargs)
         except Exception as e:
-            logger.error(f"Erro ao buscar dados CoinGecko: {e}")
+            limiter.record(host, error=e)
+            raise
+        limiter.record(host, response)
+        if not kwargs.get('stream'):
+            upstream_response_bytes.observe(len(response.content), host)
+        return response
+
+    def fetch_markets_page(self, ids, with_history=True, limiter=None):
+        """Busca uma página de /coins/markets para um lote de ids"""
+        url = "https://api.coingecko.com/api/v3/coins/markets"
+        # O sparkline de 7 dias só é baixado para semear moedas sem histórico local
+        seed = with_history and price_history.needs_seed(ids)
+        params = {
+            'vs_currency': 'usd',
+            'ids': ','.join(ids),
+            'order': 'market_cap_desc',
+            'per_page': len(ids),
+            'page': 1,
+            'sparkline': seed,
+            'price_change_percentage': '1h,24h,7d,30d'
+        }
+        response = self.get(url, limiter=limiter, params=params, timeout=10)
+        response.raise_for_status()
+        if seed:
+            price_history.mark_seed_attempted(ids)
+        return load_tickers(response.json())
+
+    def get_coingecko_data(self):
+        """Busca dados do CoinGecko dos grupos vencidos, em lotes paralelos
+
+        Retorna None se nenhum grupo venceu (nada foi buscado) e [] se todos
+        os lotes falharam. Grupos com lote que falhou continuam vencidos.
+        """
+        due = registry.due(registry.coin_groups, 'coins')
+        if not due:
+            return None
+        batches = []
+        for fetcher in dict.fromkeys(group['fetcher'] for group in due):
+            ids = list(dict.fromkeys(coin for group in due if group['fetcher'] == fetcher for coin in group['ids']))
+            batches.extend((fetcher, getattr(self, COIN_FETCHERS[fetcher]), batch) for batch in id_batches(ids))
+
+        def fetch(batch):
+            _, method, ids = batch
+            try:
+                return method(ids)
+            except Exception as e:
+                logger.error(f"Erro ao buscar dados CoinGecko: {e}")
+                return None
+
+        results = list(self.fetch_executor.map(fetch, batches))
+        failed = {fetcher for (fetcher, _, _), tickers in zip(batches, results) if tickers is None}
+        registry.mark_run([group for group in due if group['fetcher'] not in failed], 'coins')
+        if all(tickers is None for tickers in results):
+            # Nenhum lote respondeu: falha da fonte, e não os tickers anteriores como se fossem novos
             return []
+        for tickers in results:
+            for ticker in tickers or []:
+                self.coin_results[ticker['id']] = ticker
+
+        tickers = [self.coin_results[coin] for coin in COINGECKO_COINS if coin in self.coin_results]
+        return sorted(tickers, key=lambda t: t.get('market_cap_rank') or float('inf'))
 
     def get_global_crypto_stats(self):
         """Estatísticas globais do mercado"""
         try:
             url = "https://api.coingecko.com/api/v3/global"
-            response = self.session.get(url, timeout=10)
+            response = self.get(url, timeout=10)
             if response.status_code == 200:
                 data = response.json()['data']
                 return {
@@ -80,7 +271,7 @@ class CryptoDataAggregator:
         """Índice de Fear & Greed"""
         try:
             url = "https://api.alternative.me/fng/"
-            response = self.session.get(url, timeout=10)
+            response = self.get(url, timeout=10)
             if response.status_code == 200:
                 data = response.json()['data'][0]
                 return {
@@ -96,7 +287,7 @@ class CryptoDataAggregator:
         """Moedas em tendência"""
         try:
             url = "https://api.coingecko.com/api/v3/search/trending"
-            response = self.session.get(url, timeout=10)
+            response = self.get(url, timeout=10)
             if response.status_code == 200:
                 trending = response.json()['coins']
                 return [{
@@ -114,7 +305,7 @@ class CryptoDataAggregator:
         """Taxas de câmbio"""
         try:
             url = "https://api.exchangerate-api.com/v4/latest/USD"
-            response = self.session.get(url, timeout=10)
+            response = self.get(url, timeout=10)
             if response.status_code == 200:
                 rates = response.json()['rates']
                 return {
@@ -126,74 +317,82 @@ class CryptoDataAggregator:
             logger.error(f"Erro ao buscar taxas de câmbio: {e}")
         return {}
 
-    def parse_rss_feed(self, url):
-        """Parser RSS personalizado"""
+    def parse_rss_feed(self, url, limit=10):
+        """Parser RSS incremental com GET condicional (ETag/Last-Modified)"""
         try:
-            response = self.session.get(url, timeout=10)
-            if response.status_code != 200:
-                return []
-            
-            root = ET.fromstring(response.content)
-            items = []
-            
-            # Try RSS format first
-            for item in root.findall('.//item'):
-                title_elem = item.find('title')
-                link_elem = item.find('link')
-                pubdate_elem = item.find('pubDate')
-                
-                if title_elem is not None and link_elem is not None:
-                    items.append({
-                        'title': title_elem.text or '',
-                        'link': link_elem.text or '',
-                        'published': pubdate_elem.text if pubdate_elem is not None else ''
-                    })
-            
-            return items[:10]
-            
+            headers = {}
+            validators = self.feed_validators.get(url, {})
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
+
+            with self.get(url, headers=headers, timeout=10, stream=True) as response:
+                if response.status_code == 304:
+                    return self.feed_items.get(url, [])[:limit]
+                if response.status_code != 200:
+                    return None
+
+                response.raw.decode_content = True
+                items = []
+                # Lê o XML em streaming e para assim que tiver itens suficientes
+                for _, elem in ET.iterparse(response.raw, events=('end',)):
+                    if elem.tag != 'item':
+                        continue
+                    title_elem = elem.find('title')
+                    link_elem = elem.find('link')
+                    pubdate_elem = elem.find('pubDate')
+
+                    if title_elem is not None and link_elem is not None:
+                        items.append({
+                            'title': title_elem.text or '',
+                            'link': link_elem.text or '',
+                            'published': pubdate_elem.text if pubdate_elem is not None else ''
+                        })
+                    elem.clear()
+                    if len(items) >= limit:
+                        break
+
+            self.feed_items[url] = items
+            self.feed_validators[url] = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified')
+            }
+            return items
+
         except Exception as e:
             logger.error(f"Erro ao fazer parse do RSS {url}: {e}")
-            return []
+            return None
 
     def get_crypto_news(self):
-        """Notícias de criptomoedas"""
+        """Notícias de criptomoedas, das mais recentes para as mais antigas (None se nenhum feed venceu)"""
         news = []
-        
-        # Lista de feeds RSS
-        rss_feeds = [
-            {
-                'url': 'https://cointelegraph.com/rss',
-                'source': 'CoinTelegraph'
-            },
-            {
-                'url': 'https://decrypt.co/feed',
-                'source': 'Decrypt'
-            }
-        ]
-        
-        for feed_info in rss_feeds:
-            try:
-                feed_items = self.parse_rss_feed(feed_info['url'])
-                for item in feed_items[:3]:
-                    news.append({
-                        'title': item['title'],
-                        'link': item['link'],
-                        'published': item['published'],
-                        'source': feed_info['source']
-                    })
-                    
-                if len(news) >= 12:
-                    break
-                    
-            except Exception as e:
-                logger.error(f"Erro ao buscar notícias de {feed_info['source']}: {e}")
-                continue
+
+        # Feeds vencidos buscados em paralelo (concorrência limitada); os demais reaproveitam os últimos itens
+        due = registry.due(registry.feeds, 'feeds')
+        if not due:
+            return None
+        results = list(self.fetch_executor.map(
+            lambda feed: getattr(self, FEED_PARSERS[feed['parser']])(feed['url'], limit=feed['items']), due
+        ))
+        registry.mark_run([feed for feed, items in zip(due, results) if items is not None], 'feeds')
+        # Nenhum feed respondeu: só o fallback abaixo, sem reapresentar itens antigos como novos
+        feeds = registry.feeds if any(items is not None for items in results) else []
+        for feed_info in feeds:
+            for item in self.feed_items.get(feed_info['url'], [])[:feed_info['items']]:
+                news.append({
+                    'title': item['title'],
+                    'link': item['link'],
+                    'published': item['published'],
+                    'source': feed_info['source']
+                })
+        news.sort(key=lambda item: published_timestamp(item['published']), reverse=True)
         
         # Fallback: CryptoCompare API
         if not news:
             try:
                 url = "https://min-api.cryptocompare.com/data/v2/news/?lang=EN&sortOrder=latest"
-                response = self.session.get(url, timeout=10)
+                response = self.get(url, timeout=10)
                 if response.status_code == 200:
                     data = response.json()
                     for item in data.get('Data', [])[:10]:
@@ -206,23 +405,33 @@ class CryptoDataAggregator:
             except Exception as e:
                 logger.error(f"Erro ao buscar notícias CryptoCompare: {e}")
         
-        return news[:10]
+        return news
 
     def get_defi_protocols(self):
-        """Top protocolos DeFi"""
+        """Top protocolos DeFi por TVL, selecionados em streaming sem carregar a resposta inteira"""
         try:
             url = "https://api.llama.fi/protocols"
-            response = self.session.get(url, timeout=10)
-            if response.status_code == 200:
-                protocols = response.json()
-                return [{
-                    'name': p['name'],
-                    'tvl': p['tvl'],
-                    'chain': p.get('chain', 'Multi-Chain'),
-                    'category': p.get('category', 'DeFi'),
-                    'change_1d': p.get('change_1d', 0),
-                    'logo': p.get('logo', '')
-                } for p in protocols[:10]]
+            with self.get(url, timeout=10, stream=True) as response:
+                if response.status_code != 200:
+                    return []
+                size = 0
+
+                def chunks():
+                    nonlocal size
+                    for chunk in response.iter_content(DEFI_CHUNK_SIZE):
+                        size += len(chunk)
+                        yield chunk
+
+                top = TopProtocols(DEFI_INDEX_DEPTH)
+                for protocol in iter_json_array(chunks()):
+                    top.add(protocol)
+            upstream_response_bytes.observe(size, 'api.llama.fi')
+            if not top.seen:
+                # Lista vazia não substitui o índice publicado (falha, não "zero protocolos")
+                logger.warning("DeFiLlama não retornou protocolos; mantendo o índice anterior")
+                return []
+            defi_index.publish(top.build())
+            return defi_index.query(limit=DEFI_CACHE_SIZE) or []
         except Exception as e:
             logger.error(f"Erro ao buscar protocolos DeFi: {e}")
         return []
@@ -230,34 +439,370 @@ class CryptoDataAggregator:
 # Instância do agregador
 aggregator = CryptoDataAggregator()
 
-def update_cache():
-    """Atualiza o cache com dados de todas as APIs"""
+# Moedas fora das configuradas: buscadas sob demanda, agrupadas e com cache LRU
+coin_batcher = CoinBatcher(lambda ids: [
+    ticker for batch in id_batches(ids)
+    for ticker in aggregator.fetch_markets_page(batch, with_history=False, limiter=ondemand_governor)
+])
+
+# Pool para buscar as fontes em paralelo
+refresh_executor = ThreadPoolExecutor(max_workers=len(DATA_SOURCES), thread_name_prefix='refresh')
+
+def build_views(generation):
+    """Monta o conteúdo de cada endpoint /api a partir de uma geração do cache"""
+    views = {
+        'coingecko_data': generation.get('coingecko_data', []),
+        'global_metrics': generation.get('global_metrics', {}),
+        'fear_greed': generation.get('fear_greed', {}),
+        'trending': generation.get('trending', []),
+        'exchange_rates': generation.get('exchange_rates', {}),
+        'news': generation.get('news', []),
+        'defi_protocols': generation.get('defi_protocols', []),
+        'last_update': {
+            **generation.get('last_update', {}),
+            'version': generation.version,
+            'updated_at': {
+                key: datetime.fromtimestamp(ts).isoformat()
+                for key, ts in generation.updated_at.items() if key in DATA_SOURCES
+            },
+            # Seções cuja última tentativa falhou seguem com o último valor bom, marcadas como stale
+            'sections': {
+                key: {**status, 'stale': not status['ok']}
+                for key, status in generation.get('section_status', {}).items()
+            }
+        }
+    }
+    views['dashboard'] = dict(views)
+    views['analytics'] = {
+        **generation.get('analytics', {'coins': {}, 'correlation': {'coins': [], 'matrix': []}}),
+        'version': generation.version
+    }
+    return views
+
+# Snapshot pré-serializado servido pelos endpoints /api
+current_snapshot = Snapshot.build(build_views(cache.current), cache.version)
+snapshot_lock = threading.Lock()
+
+# Canal de push (SSE) com os deltas de cada nova geração
+broadcaster = DeltaBroadcaster(current_snapshot.version)
+
+# Callbacks chamados após cada novo snapshot (o modo ASGI acorda o event loop por aqui)
+snapshot_listeners = []
+
+def publish_snapshot():
+    """Recodifica as respostas da API para a geração mais recente do cache"""
+    global current_snapshot
+    with snapshot_lock:
+        generation = cache.current
+        if generation.version == current_snapshot.version:
+            return
+        previous = current_snapshot
+        current_snapshot = Snapshot.build(build_views(generation), generation.version, previous)
+        sections = compute_delta(previous.payloads['dashboard'].data, current_snapshot.payloads['dashboard'].data)
+        broadcaster.publish(previous.version, current_snapshot.version, sections)
+    evaluate_alerts(generation)
+    for listener in snapshot_listeners:
+        listener()
+
+def evaluate_alerts(generation):
+    """Confere as regras de alerta contra os preços e o Fear & Greed da geração
+
+    Só o atualizador avalia (e entrega webhooks); os demais workers leem os
+    alertas que ele grava no diretório compartilhado.
+    """
+    if not election.is_leader:
+        alert_engine.sync()
+        return
+    observations = {}
+    for ticker in generation.get('coingecko_data', []):
+        observations[('price', ticker['id'])] = ticker.get('current_price')
+        observations[('change_24h', ticker['id'])] = ticker.get('price_change_percentage_24h')
+    observations[('fear_greed', None)] = generation.get('fear_greed', {}).get('value')
+    for event in alert_engine.evaluate(observations, generation.version):
+        alerts_fired.inc(event['metric'])
+
+def snapshot_payload(name, variant=None, snapshot=None):
+    """(snapshot, payload codificado) de uma view do snapshot (o atual por padrão)
+
+    variant = (chave, função de transformação, formato) para servir uma
+    projeção da view, codificada uma vez por snapshot.
+    """
+    snapshot = snapshot or current_snapshot
+    if variant:
+        key, build, fmt = variant
+        return snapshot, snapshot.variant((name,) + key, build, fmt)
+    return snapshot, snapshot.payloads[name]
+
+def snapshot_headers(name, snapshot):
+    """Cabeçalhos de versão do cache e idade/stale da seção servida"""
+    headers = {'X-Cache-Version': str(snapshot.version)}
+    if name in DATA_SOURCES:
+        age, stale = section_freshness(name)
+        if age is not None:
+            headers['X-Data-Age'] = str(int(age))
+        headers['X-Data-Stale'] = 'true' if stale else 'false'
+    return headers
+
+def snapshot_response(name, variant=None, snapshot=None):
+    """Serve uma view do snapshot com ETag, Last-Modified e compressão"""
+    snapshot, payload = snapshot_payload(name, variant, snapshot)
+    body, encoding, etag = payload.variant(request.accept_encodings)
+    response = Response(body, mimetype=payload.mimetype)
+    response.set_etag(etag)
+    response.last_modified = payload.last_modified
+    response.vary.add('Accept-Encoding')
+    response.headers.update(snapshot_headers(name, snapshot))
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response.make_conditional(request)
+
+def section_freshness(key):
+    """(idade em segundos do último valor bom, stale) de uma seção do cache"""
+    generation = cache.current
+    age = generation.age(key)
+    failed = not generation.get('section_status', {}).get(key, {}).get('ok', True)
+    stale = failed or age is None or age > SOURCE_INTERVALS[key] * STALE_AFTER_INTERVALS
+    return age, stale
+
+# Apenas um processo (o atualizador eleito) consulta as APIs externas
+os.makedirs(DATA_DIR, exist_ok=True)
+election = UpdaterElection(os.path.join(DATA_DIR, 'updater.lock'))
+shared_store = FileSnapshotStore(os.path.join(DATA_DIR, 'snapshot.json'))
+source_store = SourceStore(os.path.join(DATA_DIR, 'sources'))
+
+def cache_updated():
+    """Publica a nova geração do cache para as respostas locais e para os outros workers"""
+    publish_snapshot()
+    if election.is_leader:
+        try:
+            shared_store.write(cache.current)
+        except Exception as e:
+            logger.error(f"Erro ao gravar snapshot compartilhado: {e}")
+
+def sync_shared_cache():
+    """Carrega o snapshot compartilhado se o atualizador publicou uma nova geração"""
+    result = shared_store.read_if_changed()
+    if result:
+        version, data, updated_at = result
+        if 'coingecko_data' in data:
+            data['coingecko_data'] = load_tickers(data['coingecko_data'])
+        cache.install(version, data, updated_at)
+        publish_snapshot()
+
+def coin_aliases():
+    """Id, nome e símbolo de cada moeda conhecida -> id, para detectar menções nas notícias"""
+    aliases = {coin: coin for coin in COINGECKO_COINS}
+    for ticker in cache.get('coingecko_data', []):
+        for alias in (ticker.get('id'), ticker.get('name'), ticker.get('symbol')):
+            if alias and ' ' not in alias:
+                aliases[alias.lower()] = ticker['id']
+    return aliases
+
+def section_status(current, key, error=None):
+    """Estado da última tentativa de atualizar a seção (falhas consecutivas e erro)"""
+    status = dict(current.get('section_status', {}))
+    previous = status.get(key, {})
+    status[key] = {
+        'ok': error is None,
+        'failures': 0 if error is None else previous.get('failures', 0) + 1,
+        'error': None if error is None else str(error),
+        'last_attempt': datetime.now().isoformat()
+    }
+    return status
+
+def record_source_failure(key, error):
+    """Marca a seção como desatualizada sem tocar no último valor bom"""
+    cache.update(lambda current: {
+        'section_status': section_status(current, key, error),
+        'upstream_status': {
+            'as_of': datetime.now().isoformat(),
+            'upstreams': governor.status(),
+            'connections': aggregator.transport.stats()
+        }
+    })
+    cache_updated()
+
+def fetch_source(key):
+    """Busca uma fonte e publica no cache assim que ela termina
+
+    Falhas (exceção ou resposta vazia) nunca sobrescrevem a seção: o último
+    valor bom continua sendo servido, marcado como desatualizado, até a
+    próxima tentativa do agendador dar certo.
+    """
+    host = SOURCE_HOSTS.get(key)
+    if host and governor.is_open(host):
+        # Falha rápida: mantém os últimos dados sem esperar o timeout
+        source_fetches.inc(key, 'skipped')
+        error = UpstreamUnavailable(f"Circuito aberto para {host}; mantendo os últimos dados de {key}")
+        record_source_failure(key, error)
+        raise error
+
+    start = time.perf_counter()
     try:
-        cache['coingecko_data'] = aggregator.get_coingecko_data()
-        cache['global_metrics'] = aggregator.get_global_crypto_stats()
-        cache['fear_greed'] = aggregator.get_fear_greed_index()
-        cache['trending'] = aggregator.get_trending_coins()
-        cache['exchange_rates'] = aggregator.get_exchange_rates()
-        cache['news'] = aggregator.get_crypto_news()
-        cache['defi_protocols'] = aggregator.get_defi_protocols()
-        cache['last_update']['timestamp'] = datetime.now().isoformat()
-        
-        logger.info("Cache atualizado com sucesso")
+        data = getattr(aggregator, DATA_SOURCES[key])()
     except Exception as e:
-        logger.error(f"Erro ao atualizar cache: {e}")
+        source_fetches.inc(key, 'error')
+        record_source_failure(key, e)
+        raise
+    elapsed = time.perf_counter() - start
+    if data is None:
+        # Nada venceu e nada foi buscado: seção, idade e estado ficam como estão
+        source_fetches.inc(key, 'unchanged')
+        return elapsed
+    source_fetch_seconds.observe(elapsed, key)
+    # Os fetchers tratam os próprios erros e retornam vazio
+    source_fetches.inc(key, 'success' if data else 'empty')
+    if not data:
+        record_source_failure(key, 'Nenhum dado retornado')
+        return elapsed
+
+    derived = {}
+    try:
+        if key == 'coingecko_data':
+            # Histórico e indicadores entram na mesma geração que os preços
+            price_history.ingest(data)
+            derived['analytics'] = market_analytics.compute([ticker['id'] for ticker in data if 'id' in ticker])
+        elif key == 'news':
+            # Todas as notícias vão para o índice; o cache guarda só as mais recentes
+            news_index.add_many(data, coin_aliases())
+    except Exception as e:
+        # Dados derivados com erro não impedem a publicação da seção
+        logger.error(f"Erro ao processar dados derivados de {key}: {e}")
+    if key == 'news':
+        data = data[:NEWS_CACHE_SIZE]
+
+    def changes(current):
+        last_update = current.get('last_update', {})
+        return {
+            key: data,
+            **derived,
+            'section_status': section_status(current, key),
+            'upstream_status': {
+                'as_of': datetime.now().isoformat(),
+                'upstreams': governor.status(),
+                'connections': aggregator.transport.stats()
+            },
+            'last_update': {
+                **last_update,
+                'timestamp': datetime.now().isoformat(),
+                'timings': {**last_update.get('timings', {}), key: round(elapsed, 3)},
+                'stale': False
+            }
+        }
+
+    generation = cache.update(changes)
+    cache_updated()
+    try:
+        source_store.save(key, data, generation.updated_at[key])
+    except Exception as e:
+        logger.error(f"Erro ao persistir {key}: {e}")
+    return elapsed
+
+def refresh_source(key):
+    """Atualiza uma única fonte; retorna False se a tentativa falhou (o agendador tenta de novo em breve)"""
+    fetch_source(key)
+    return cache.get('section_status', {}).get(key, {}).get('ok', False)
+
+def update_cache():
+    """Atualiza o cache com dados de todas as APIs em paralelo"""
+    start = time.perf_counter()
+    futures = {refresh_executor.submit(fetch_source, key): key for key in DATA_SOURCES}
+    timings = {}
+
+    try:
+        for future in as_completed(futures, timeout=CACHE_UPDATE_DEADLINE):
+            key = futures[future]
+            try:
+                timings[key] = round(future.result(), 3)
+            except Exception as e:
+                timings[key] = None
+                logger.error(f"Erro ao atualizar {key}: {e}")
+    except concurrent.futures.TimeoutError:
+        # Fontes atrasadas continuam rodando e gravam no cache quando terminarem
+        pending = [key for future, key in futures.items() if not future.done()]
+        for key in pending:
+            timings[key] = 'timeout'
+        logger.warning(f"Prazo de {CACHE_UPDATE_DEADLINE}s esgotado; fontes pendentes: {', '.join(pending)}")
+
+    duration = round(time.perf_counter() - start, 3)
+    update_cycle_seconds.observe(duration)
+    # Pronto só se alguma fonte trouxe dados neste ciclo (fontes atrasadas liberam ao terminar)
+    status = cache.get('section_status', {})
+    fresh = any(status.get(key, {}).get('ok') for key, elapsed in timings.items() if isinstance(elapsed, float))
+    cache.publish({'last_update': {
+        'timestamp': datetime.now().isoformat(),
+        'duration': duration,
+        'timings': timings,
+        'stale': not fresh
+    }})
+    cache_updated()
+    logger.info(f"Cache atualizado em {duration}s: {timings}")
+
+# Agendador com intervalo, jitter e backoff independentes por fonte
+scheduler = RefreshScheduler(refresh_executor, refresh_source)
+for key, interval in SOURCE_INTERVALS.items():
+    scheduler.add(key, interval, initial_delay=interval)
 
 def background_updater():
     """Atualiza o cache em background"""
-    while True:
+    scheduler.run_forever()
+
+def warm_start():
+    """Carrega do disco o último resultado de cada fonte, marcado como desatualizado"""
+    start = time.perf_counter()
+    entries = source_store.load_all(DATA_SOURCES)
+    if not entries:
+        return
+    if 'coingecko_data' in entries:
+        tickers, updated_at = entries['coingecko_data']
+        entries['coingecko_data'] = (load_tickers(tickers), updated_at)
+    cache.restore(entries)
+    cache.update(lambda current: {'last_update': {**current.get('last_update', {}), 'stale': True}})
+    cache_updated()
+    logger.info(f"{len(entries)} fontes carregadas do disco em {(time.perf_counter() - start) * 1000:.1f}ms")
+
+def start_updater():
+    """Inicia a hidratação e o agendador em background (atualizador eleito)"""
+    logger.info(f"Processo {os.getpid()} eleito atualizador do cache")
+
+    def run():
         update_cache()
-        time.sleep(300)  # Atualiza a cada 5 minutos
+        background_updater()
 
-# Inicia o atualizador em background
-thread = threading.Thread(target=background_updater, daemon=True)
-thread.start()
+    threading.Thread(target=run, daemon=True).start()
 
-# Atualização inicial
-update_cache()
+def follow_shared_cache():
+    """sync_shared_cache() de um seguidor; erros são registrados e a próxima volta tenta de novo"""
+    try:
+        sync_shared_cache()
+    except Exception as e:
+        logger.error(f"Erro ao sincronizar o snapshot compartilhado: {e}")
+
+def follower_loop():
+    """Workers seguidores leem o snapshot compartilhado e assumem se o atualizador cair"""
+    while True:
+        time.sleep(SHARED_POLL_INTERVAL)
+        try:
+            if election.try_acquire():
+                start_updater()
+                return
+        except Exception as e:
+            logger.error(f"Erro na eleição do atualizador: {e}")
+            continue
+        follow_shared_cache()
+
+def start_background():
+    """Inicialização não bloqueante: serve o último snapshot e hidrata em background"""
+    if election.try_acquire():
+        warm_start()
+        start_updater()
+    else:
+        follow_shared_cache()
+        threading.Thread(target=follower_loop, daemon=True).start()
+
+# No modo ASGI (asgi.py) o atualizador roda como tarefa do event loop
+if os.environ.get('CRYPTO_DASHBOARD_ASGI') != '1':
+    start_background()
 
 @app.route('/')
 def index():
@@ -582,7 +1127,52 @@ def index():
 
             async init() {
                 await this.loadData();
-                this.startAutoUpdate();
+                if (window.EventSource) {
+                    this.subscribe();
+                } else {
+                    this.startAutoUpdate();
+                }
+            }
+
+            subscribe() {
+                const version = this.data.last_update?.version || 0;
+                this.source = new EventSource(`/api/stream?since=${version}`);
+
+                this.source.addEventListener('delta', (event) => {
+                    this.applyDelta(JSON.parse(event.data));
+                    this.updateAllSections();
+                    this.updateLiveStatus();
+                });
+
+                this.source.addEventListener('reset', async () => {
+                    this.source.close();
+                    await this.loadData();
+                    this.subscribe();
+                });
+
+                this.source.onerror = () => {
+                    if (this.source.readyState === EventSource.CLOSED) {
+                        // Servidor sem SSE (503): atualiza por polling
+                        this.source = null;
+                        this.startAutoUpdate();
+                        return;
+                    }
+                    this.updateStatus('loading', 'Reconectando...');
+                };
+            }
+
+            applyDelta(delta) {
+                Object.entries(delta.sections).forEach(([name, change]) => {
+                    if ('replace' in change) {
+                        this.data[name] = change.replace;
+                        return;
+                    }
+                    const idField = name === 'news' ? 'link' : 'id';
+                    const items = new Map((this.data[name] || []).map(item => [item[idField], item]));
+                    change.remove.forEach(id => items.delete(id));
+                    change.upsert.forEach(item => items.set(item[idField], item));
+                    this.data[name] = change.order.map(id => items.get(id)).filter(Boolean);
+                });
             }
 
             updateStatus(status, message) {
@@ -600,6 +1190,17 @@ def index():
                 }
             }
 
+            updateLiveStatus() {
+                const sections = Object.values(this.data.last_update?.sections || {});
+                if (this.data.last_update?.stale) {
+                    this.updateStatus('loading', 'Dados em cache');
+                } else if (sections.some(section => section.stale)) {
+                    this.updateStatus('loading', 'Dados parciais');
+                } else {
+                    this.updateStatus('success', 'Live Data');
+                }
+            }
+
             async loadData() {
                 try {
                     this.updateStatus('loading', 'Carregando...');
@@ -612,7 +1213,7 @@ def index():
                     
                     this.data = await response.json();
                     this.updateAllSections();
-                    this.updateStatus('success', 'Live Data');
+                    this.updateLiveStatus();
                     
                 } catch (error) {
                     console.error('Erro ao carregar dados:', error);
@@ -724,6 +1325,7 @@ def index():
             }
 
             startAutoUpdate() {
+                if (this.updateInterval) return;
                 this.updateInterval = setInterval(() => {
                     this.loadData();
                 }, 300000); // 5 minutos
@@ -778,54 +1380,302 @@ def index():
 </body>
 </html>'''
 
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.get('request_start')
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        request_seconds.observe(time.perf_counter() - start, route)
+        requests_total.inc(route, str(response.status_code))
+    return response
+
+def payload_sizes():
+    snapshot = current_snapshot
+    for name, payload in snapshot.payloads.items():
+        yield (name, 'identity'), len(payload.body)
+        yield (name, 'gzip'), len(payload.gzip)
+        if payload.brotli is not None:
+            yield (name, 'br'), len(payload.brotli)
+
+metrics.gauge('crypto_cache_age_seconds', 'Segundos desde a última atualização de cada chave do cache', ('key',),
+              lambda: [((key,), cache.current.age(key)) for key in DATA_SOURCES])
+metrics.gauge('crypto_cache_version', 'Versão (geração) atual do cache', (),
+              lambda: [((), cache.version)])
+metrics.gauge('crypto_payload_bytes', 'Tamanho das respostas pré-codificadas do snapshot', ('view', 'encoding'),
+              payload_sizes)
+metrics.gauge('crypto_source_consecutive_failures', 'Falhas consecutivas de cada fonte no agendador', ('source',),
+              lambda: [((key,), state['failures']) for key, state in scheduler.status().items()]
+              if election.is_leader else [])
+
+@app.route('/metrics')
+def get_metrics():
+    """Métricas deste processo no formato texto do Prometheus"""
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def requested_currency(snapshot):
+    """Lê ?currency= (padrão usd): (moeda, cotação USD -> moeda nas taxas do snapshot)
+
+    Levanta ValueError se a moeda não tem cotação em cache.
+    """
+    currency = request.args.get('currency', BASE_CURRENCY).lower()
+    rate = currency_rate(currency, snapshot.payloads['exchange_rates'].data)
+    if rate is None:
+        raise ValueError(f"Moeda não suportada: {currency}")
+    return currency, rate
+
+def ticker_projection(snapshot, currency, rate):
+    """Lê ?fields=, ?limit=, ?layout=columns e ?format=msgpack da requisição
+
+    A moeda e a cotação vêm de requested_currency(). Retorna (chave, função
+    que projeta a lista de tickers, formato), ou None sem parâmetros;
+    levanta ValueError para formato inválido.
+    """
+    # Chave normalizada: ordem e repetição de campos e limites além da lista não criam variantes novas
+    fields = tuple(sorted({f for f in request.args.get('fields', '').split(',') if f}))
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        limit = max(limit, 0)
+        if limit >= len(snapshot.payloads['coingecko_data'].data):
+            limit = None
+    columns = request.args.get('layout') == 'columns'
+    fmt = request.args.get('format', 'json')
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato não suportado: {fmt}")
+    if not (fields or limit is not None or columns or fmt != 'json' or currency != BASE_CURRENCY):
+        return None
+
+    def project(tickers):
+        if currency != BASE_CURRENCY:
+            # Conversão vetorizada feita uma vez por snapshot e compartilhada entre projeções
+            converted = tickers
+            tickers = snapshot.derived(('coingecko_data', currency), lambda: convert_tickers(converted, rate))
+        tickers = tickers[:limit] if limit is not None else tickers
+        names = fields or tuple(dict.fromkeys(key for ticker in tickers for key in ticker))
+        if columns:
+            return {
+                'fields': list(names),
+                'rows': len(tickers),
+                'columns': {name: [ticker.get(name) for ticker in tickers] for name in names}
+            }
+        return [{name: ticker.get(name) for name in names} for ticker in tickers]
+
+    return (fields, limit, columns, currency, fmt), project, fmt
+
 @app.route('/api/dashboard-data')
 def get_dashboard_data():
-    """Endpoint principal com todos os dados do dashboard"""
-    return jsonify({
-        'coingecko_data': cache.get('coingecko_data', []),
-        'global_metrics': cache.get('global_metrics', {}),
-        'fear_greed': cache.get('fear_greed', {}),
-        'trending': cache.get('trending', []),
-        'exchange_rates': cache.get('exchange_rates', {}),
-        'news': cache.get('news', []),
-        'defi_protocols': cache.get('defi_protocols', []),
-        'last_update': cache.get('last_update', {})
-    })
+    """Endpoint principal com todos os dados do dashboard (aceita fields/limit/layout/format/currency nos tickers)"""
+    snapshot = current_snapshot
+    try:
+        currency, rate = requested_currency(snapshot)
+        projection = ticker_projection(snapshot, currency, rate)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not projection:
+        return snapshot_response('dashboard', snapshot=snapshot)
+
+    key, project, fmt = projection
+    build = lambda data: {
+        **data,
+        'coingecko_data': project(data['coingecko_data']),
+        'global_metrics': convert_global_metrics(data['global_metrics'], rate)
+    }
+    return snapshot_response('dashboard', (key, build, fmt), snapshot)
+
+@app.route('/api/status')
+def get_status():
+    """Estado dos circuitos e orçamento de rate limit das APIs externas"""
+    if election.is_leader:
+        return jsonify({
+            'updater': True,
+            'upstreams': governor.status(),
+            'ondemand': ondemand_governor.status(),
+            'connections': aggregator.transport.stats(),
+            'sources': scheduler.status()
+        })
+    return jsonify({'updater': False, 'ondemand': ondemand_governor.status(), **cache.get('upstream_status', {})})
+
+@app.route('/api/ready')
+def readiness():
+    """Readiness: 200 quando há dados atualizados desde a inicialização, 503 caso contrário"""
+    generation = cache.current
+    last_update = generation.get('last_update', {})
+    ready = not last_update.get('stale', True)
+    body = {
+        'ready': ready,
+        'stale': not ready,
+        'version': generation.version,
+        'last_update': last_update.get('timestamp'),
+        'updater': election.is_leader
+    }
+    return jsonify(body), 200 if ready else 503
+
+@app.route('/api/stream')
+def stream_updates():
+    """Push (Server-Sent Events) com deltas por seção a cada atualização do cache"""
+    if not SSE_ENABLED:
+        # O dashboard volta ao polling; sem isso cada aba aberta ocuparia uma thread do worker
+        return jsonify({'error': 'SSE desativado neste servidor (CRYPTO_DASHBOARD_SSE=1 para ativar)'}), 503
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        since = int(since)
+    except (TypeError, ValueError):
+        since = current_snapshot.version
+
+    response = Response(broadcaster.stream(since), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/history/<coin>')
+def get_history(coin):
+    """Histórico de preços de uma moeda (?start=&end= em epoch, ?points= para reduzir)"""
+    start = request.args.get('start', type=float)
+    end = request.args.get('end', type=float)
+    points = min(max(request.args.get('points', 200, type=int), 1), HISTORY_MAX_POINTS)
+
+    data = price_history.query(coin, start, end, points) if COIN_ID_PATTERN.match(coin) else None
+    if data is None:
+        return jsonify({'error': 'Moeda sem histórico'}), 404
+    return jsonify({'coin': coin, 'points': data})
+
+@app.route('/api/analytics')
+def get_analytics():
+    """Médias móveis, RSI, volatilidade, drawdown e correlação entre as moedas"""
+    return snapshot_response('analytics')
 
 @app.route('/api/tickers')
 def get_tickers():
-    """Endpoint para dados específicos de tickers"""
-    return jsonify(cache.get('coingecko_data', []))
+    """Endpoint para dados específicos de tickers (?fields=, ?limit=, ?layout=columns, ?format=msgpack, ?currency=)"""
+    snapshot = current_snapshot
+    try:
+        projection = ticker_projection(snapshot, *requested_currency(snapshot))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return snapshot_response('coingecko_data', projection, snapshot)
+
+# Índice id -> ticker da geração atual (reconstruído só quando a versão muda)
+ticker_index = (None, {})
+
+def cached_ticker(coin_id):
+    global ticker_index
+    generation = cache.current
+    version, index = ticker_index
+    if version != generation.version:
+        index = {ticker.get('id'): ticker for ticker in generation.get('coingecko_data', [])}
+        ticker_index = (generation.version, index)
+    return index.get(coin_id)
+
+@app.route('/api/tickers/<coin_id>')
+def get_ticker(coin_id):
+    """Ticker de uma moeda; moedas fora do cache são buscadas sob demanda"""
+    if not COIN_ID_PATTERN.match(coin_id):
+        return jsonify({'error': 'Moeda não encontrada'}), 404
+
+    ticker = cached_ticker(coin_id)
+    if ticker is None:
+        try:
+            ticker = coin_batcher.get(coin_id)
+        except Exception as e:
+            logger.error(f"Erro ao buscar {coin_id} sob demanda: {e}")
+            return jsonify({'error': 'Dados indisponíveis no momento'}), 503
+    if ticker is None:
+        return jsonify({'error': 'Moeda não encontrada'}), 404
+    return jsonify(ticker.to_dict())
+
+@app.route('/api/alerts', methods=['GET', 'POST'])
+def alerts_collection():
+    """Regras de alerta: POST registra uma regra (ou uma lista delas), GET mostra o estado do motor
+
+    Regra: {"metric": "price"|"change_24h"|"fear_greed", "coin": "bitcoin",
+    "direction": "above"|"below", "threshold": 70000, "webhook": "http://127.0.0.1:9000/hook"}
+    """
+    if request.method == 'GET':
+        return jsonify(alert_engine.status())
+
+    body = request.get_json(silent=True)
+    specs = body if isinstance(body, list) else [body]
+    if not specs or not all(isinstance(spec, dict) for spec in specs):
+        return jsonify({'error': 'Envie uma regra ou uma lista de regras em JSON'}), 400
+    try:
+        rules = alert_engine.add_many(specs)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if isinstance(body, list):
+        return jsonify({'created': len(rules), 'ids': [rule.id for rule in rules]}), 201
+    return jsonify(rules[0].to_dict()), 201
+
+@app.route('/api/alerts/<int:rule_id>', methods=['GET', 'DELETE'])
+def alert_rule(rule_id):
+    """Consulta ou remove uma regra de alerta"""
+    rule = alert_engine.get(rule_id)
+    if rule is None:
+        return jsonify({'error': 'Regra não encontrada'}), 404
+    if request.method == 'DELETE':
+        alert_engine.remove(rule_id)
+        return '', 204
+    return jsonify(rule.to_dict())
+
+@app.route('/api/alerts/events')
+def alert_events():
+    """Alertas disparados depois de ?since= (long-poll de até ?wait= segundos se não houver nenhum e o SSE estiver ativo)"""
+    since = request.args.get('since', 0, type=int)
+    wait = min(max(request.args.get('wait', 0, type=float), 0), ALERT_WAIT_MAX)
+    if not SSE_ENABLED:
+        wait = 0  # Como o /api/stream: sem long-poll, o cliente consulta de novo com o mesmo since
+    events = alert_engine.events_since(since)
+    if not events and wait:
+        alert_engine.wait(since, wait)
+        events = alert_engine.events_since(since)
+    return jsonify({'events': events, 'last_event_id': alert_engine.last_event_id})
 
 @app.route('/api/global-stats')
 def get_global_stats():
     """Estatísticas globais do mercado"""
-    return jsonify(cache.get('global_metrics', {}))
+    return snapshot_response('global_metrics')
 
 @app.route('/api/fear-greed')
 def get_fear_greed():
     """Índice de Fear & Greed"""
-    return jsonify(cache.get('fear_greed', {}))
+    return snapshot_response('fear_greed')
 
 @app.route('/api/trending')
 def get_trending():
     """Moedas em tendência"""
-    return jsonify(cache.get('trending', []))
+    return snapshot_response('trending')
 
 @app.route('/api/news')
 def get_news():
-    """Notícias de crypto"""
-    return jsonify(cache.get('news', []))
+    """Notícias de crypto; com ?q=, ?coin=, ?cursor= ou ?limit= busca no índice completo"""
+    if not request.args:
+        return snapshot_response('news')
+
+    limit = min(max(request.args.get('limit', 20, type=int), 1), NEWS_PAGE_MAX)
+    result = news_index.search(
+        query=request.args.get('q', ''),
+        coin=request.args.get('coin'),
+        cursor=request.args.get('cursor', type=int),
+        limit=limit
+    )
+    return jsonify(result)
 
 @app.route('/api/defi')
 def get_defi():
-    """Protocolos DeFi"""
-    return jsonify(cache.get('defi_protocols', []))
+    """Protocolos DeFi por TVL (?chain=, ?category=, ?limit= consultam o índice pré-calculado)"""
+    if not request.args:
+        return snapshot_response('defi_protocols')
+
+    limit = min(max(request.args.get('limit', DEFI_CACHE_SIZE, type=int), 1), DEFI_INDEX_DEPTH)
+    items = defi_index.query(request.args.get('chain'), request.args.get('category'), limit)
+    return jsonify(items or [])
 
 @app.route('/api/exchange-rates')
 def get_exchange_rates_endpoint():
     """Taxas de câmbio"""
-    return jsonify(cache.get('exchange_rates', {}))
+    return snapshot_response('exchange_rates')
 
 @app.errorhandler(404)
 def not_found(error):
@@ -839,8 +1689,10 @@ if __name__ == '__main__':
     print("🚀 Iniciando CryptoPro Dashboard...")
     print("📊 Dashboard disponível em: http://localhost:5000")
     print("⚡ APIs integradas: CoinGecko, Alternative.me, DeFiLlama, ExchangeRate")
-    print("🔄 Auto-refresh: 5 minutos")
+    print("🔄 Auto-refresh: por fonte (1 a 60 minutos)")
     print("❌ Para parar: Ctrl+C")
     print("=" * 60)
-    
+
+    # O servidor do Flask abre uma thread por conexão, então o SSE não esgota um pool fixo
+    SSE_ENABLED = True
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,330 @@
+import asyncio
+import io
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from werkzeug.http import http_date, parse_accept_header, parse_date, parse_etags
+
+# Importado antes do app: o atualizador é iniciado pelo lifespan, não na importação
+os.environ['CRYPTO_DASHBOARD_ASGI'] = '1'
+import app as dashboard  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+# Rotas servidas direto do snapshot (sem query string; com parâmetros vão para o Flask)
+SNAPSHOT_ROUTES = {
+    '/api/dashboard-data': 'dashboard',
+    '/api/tickers': 'coingecko_data',
+    '/api/global-stats': 'global_metrics',
+    '/api/fear-greed': 'fear_greed',
+    '/api/trending': 'trending',
+    '/api/news': 'news',
+    '/api/defi': 'defi_protocols',
+    '/api/exchange-rates': 'exchange_rates',
+    '/api/analytics': 'analytics'
+}
+SSE_HEARTBEAT = 15
+WSGI_THREADS = int(os.environ.get('CRYPTO_ASGI_WSGI_THREADS', '32'))  # Threads para as rotas do Flask
+
+wsgi_executor = ThreadPoolExecutor(max_workers=WSGI_THREADS, thread_name_prefix='wsgi')
+
+
+class SnapshotSignal:
+    """Acorda as corrotinas à espera de um novo snapshot; notify() pode vir de qualquer thread"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.event = asyncio.Event()
+
+    def notify(self):
+        self.loop.call_soon_threadsafe(self._fire)
+
+    def _fire(self):
+        self.event.set()
+        self.event = asyncio.Event()
+
+    async def wait(self, timeout, disconnected):
+        """Espera o próximo snapshot, o timeout ou a desconexão do cliente"""
+        waiter = asyncio.ensure_future(self.event.wait())
+        try:
+            await asyncio.wait({waiter, disconnected}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiter.cancel()
+
+
+_signal = None
+
+
+def snapshot_signal():
+    global _signal
+    if _signal is None:
+        _signal = SnapshotSignal(asyncio.get_running_loop())
+        dashboard.snapshot_listeners.append(_signal.notify)
+    return _signal
+
+
+def request_headers(scope):
+    return {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']}
+
+
+def watch_disconnect(receive):
+    """Future concluído quando o cliente fecha a conexão"""
+    async def watch():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+    return asyncio.ensure_future(watch())
+
+
+async def send_response(send, status, headers, body=b''):
+    headers = {**headers, 'Content-Length': str(len(body)), 'Access-Control-Allow-Origin': '*'}
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.encode('latin-1'), value.encode('latin-1')) for name, value in headers.items()]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_json(send, data, status=200):
+    await send_response(send, status, {'Content-Type': 'application/json'}, dashboard.app.json.dumps(data).encode('utf-8'))
+
+
+def not_modified(headers, etag, last_modified):
+    if 'if-none-match' in headers:
+        return parse_etags(headers['if-none-match']).contains(etag)
+    since = parse_date(headers.get('if-modified-since'))
+    return since is not None and last_modified is not None and last_modified <= since
+
+
+async def serve_snapshot(name, headers, send):
+    """Mesmo conteúdo, ETag e compressão de snapshot_response(), sem passar pelo Flask"""
+    snapshot, payload = dashboard.snapshot_payload(name)
+    body, encoding, etag = payload.variant(parse_accept_header(headers.get('accept-encoding')))
+    response_headers = {
+        'Content-Type': payload.mimetype,
+        'ETag': f'"{etag}"',
+        'Last-Modified': http_date(payload.last_modified),
+        'Vary': 'Accept-Encoding',
+        **dashboard.snapshot_headers(name, snapshot)
+    }
+    if not_modified(headers, etag, payload.last_modified):
+        await send_response(send, 304, response_headers)
+        return 304
+    if encoding:
+        response_headers['Content-Encoding'] = encoding
+    await send_response(send, 200, response_headers, body)
+    return 200
+
+
+_index_body = None
+
+
+async def serve_index(send):
+    global _index_body
+    if _index_body is None:
+        _index_body = dashboard.index().encode('utf-8')
+    await send_response(send, 200, {'Content-Type': 'text/html; charset=utf-8'}, _index_body)
+    return 200
+
+
+def query_value(query, name, cast, default):
+    try:
+        return cast(query[name][0])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return default
+
+
+async def serve_stream(headers, query, receive, send):
+    """/api/stream: SSE com os deltas do broadcaster, uma corrotina por cliente"""
+    broadcaster = dashboard.broadcaster
+    since = query_value({'since': [headers['last-event-id']]} if 'last-event-id' in headers else query,
+                        'since', int, None)
+    version = broadcaster.version if since is None else since
+    signal = snapshot_signal()
+    disconnected = watch_disconnect(receive)
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+            (b'access-control-allow-origin', b'*')
+        ]
+    })
+    try:
+        await send({'type': 'http.response.body', 'body': b'retry: 5000\n\n', 'more_body': True})
+        while not disconnected.done():
+            events = broadcaster.events_since(version)
+            if events is None:
+                # Cliente muito atrasado: pede para recarregar o snapshot completo
+                version = broadcaster.version
+                chunk = f"id: {version}\nevent: reset\ndata: {{}}\n\n".encode('utf-8')
+            elif events:
+                chunk = b''.join(event for _, _, event in events)
+                version = events[-1][1]
+            else:
+                chunk = b': ping\n\n'
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            if broadcaster.version <= version:
+                await signal.wait(SSE_HEARTBEAT, disconnected)
+    finally:
+        disconnected.cancel()
+    return 200
+
+
+async def serve_alert_events(query, receive, send):
+    """/api/alerts/events: long-poll sem ocupar thread enquanto espera"""
+    engine = dashboard.alert_engine
+    since = query_value(query, 'since', int, 0)
+    wait = min(max(query_value(query, 'wait', float, 0), 0), dashboard.ALERT_WAIT_MAX)
+    events = engine.events_since(since)
+    if not events and wait:
+        signal = snapshot_signal()
+        disconnected = watch_disconnect(receive)
+        deadline = time.monotonic() + wait
+        try:
+            while not events and not disconnected.done():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                await signal.wait(remaining, disconnected)
+                events = engine.events_since(since)
+        finally:
+            disconnected.cancel()
+    await send_json(send, {'events': events, 'last_event_id': engine.last_event_id})
+    return 200
+
+
+def wsgi_environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            environ[name] = value
+        else:
+            key = f'HTTP_{name}'
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def run_wsgi(environ):
+    """Executa o app Flask numa thread do pool e junta a resposta"""
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = headers
+
+    result = dashboard.app(environ, start_response)
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return response['status'], response['headers'], body
+
+
+async def serve_wsgi(scope, receive, send):
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    environ = wsgi_environ(scope, b''.join(chunks))
+    status, headers, body = await asyncio.get_running_loop().run_in_executor(wsgi_executor, run_wsgi, environ)
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+    return None  # As métricas da requisição são registradas pelo próprio Flask
+
+
+async def run_updater():
+    """Atualizador do cache como tarefa do event loop; seguidores acompanham o snapshot compartilhado"""
+    loop = asyncio.get_running_loop()
+    while not dashboard.election.try_acquire():
+        await loop.run_in_executor(None, dashboard.follow_shared_cache)
+        await asyncio.sleep(dashboard.SHARED_POLL_INTERVAL)
+    logger.info(f"Processo {os.getpid()} eleito atualizador do cache (ASGI)")
+    await loop.run_in_executor(None, dashboard.update_cache)
+    await dashboard.scheduler.run_async()
+
+
+async def lifespan(receive, send):
+    tasks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            snapshot_signal()
+            loop = asyncio.get_running_loop()
+            # Último resultado em disco antes de aceitar requisições (sem esperar as APIs externas)
+            if dashboard.election.try_acquire():
+                await loop.run_in_executor(None, dashboard.warm_start)
+            else:
+                await loop.run_in_executor(None, dashboard.follow_shared_cache)
+            tasks.append(asyncio.create_task(run_updater()))
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            dashboard.scheduler.stop()
+            for task in tasks:
+                task.cancel()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    start = time.perf_counter()
+    path = scope['path']
+    query = parse_qs(scope['query_string'].decode('latin-1'))
+    if scope['method'] != 'GET':
+        status = await serve_wsgi(scope, receive, send)
+    elif path == '/':
+        status = await serve_index(send)
+    elif path in SNAPSHOT_ROUTES and not query:
+        status = await serve_snapshot(SNAPSHOT_ROUTES[path], request_headers(scope), send)
+    elif path == '/api/stream':
+        status = await serve_stream(request_headers(scope), query, receive, send)
+    elif path == '/api/alerts/events':
+        status = await serve_alert_events(query, receive, send)
+    else:
+        status = await serve_wsgi(scope, receive, send)
+
+    if status is not None:
+        dashboard.request_seconds.observe(time.perf_counter() - start, path)
+        dashboard.requests_total.inc(path, str(status))
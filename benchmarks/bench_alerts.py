@@ -0,0 +1,82 @@
+"""Mede o custo de avaliar as regras de alerta a cada atualização de preços
+
+Uso: python benchmarks/bench_alerts.py [regras] [moedas] [atualizações]
+Imprime um JSON com os resultados.
+"""
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alerts import AlertEngine  # noqa: E402
+
+
+def fake_rules(count, prices):
+    coins = list(prices)
+    rules = []
+    for _ in range(count):
+        kind = random.random()
+        if kind < 0.7:
+            coin = random.choice(coins)
+            rules.append({'metric': 'price', 'coin': coin, 'direction': random.choice(('above', 'below')),
+                          'threshold': prices[coin] * random.uniform(0.8, 1.2)})
+        elif kind < 0.95:
+            rules.append({'metric': 'change_24h', 'coin': random.choice(coins),
+                          'direction': random.choice(('above', 'below')), 'threshold': random.uniform(-15, 15)})
+        else:
+            rules.append({'metric': 'fear_greed', 'direction': random.choice(('above', 'below')),
+                          'threshold': random.randint(0, 100)})
+    return rules
+
+
+def observations(prices, changes, fear_greed):
+    values = {('fear_greed', None): fear_greed}
+    for coin, price in prices.items():
+        values[('price', coin)] = price
+        values[('change_24h', coin)] = changes[coin]
+    return values
+
+
+def main(rules=100000, coins=500, updates=50):
+    random.seed(0)
+    prices = {f'coin-{i}': random.uniform(0.01, 60000) for i in range(coins)}
+    changes = {coin: random.uniform(-5, 5) for coin in prices}
+    fear_greed = 50
+
+    engine = AlertEngine(max_rules=rules)
+    start = time.perf_counter()
+    engine.add_many(fake_rules(rules, prices))
+    register = time.perf_counter() - start
+    engine.evaluate(observations(prices, changes, fear_greed))
+
+    timings = []
+    fired = 0
+    for _ in range(updates):
+        # Movimento típico entre atualizações: até ±1% no preço
+        prices = {coin: price * random.uniform(0.99, 1.01) for coin, price in prices.items()}
+        changes = {coin: change + random.uniform(-0.5, 0.5) for coin, change in changes.items()}
+        fear_greed = min(max(fear_greed + random.randint(-3, 3), 0), 100)
+        values = observations(prices, changes, fear_greed)
+        start = time.perf_counter()
+        fired += len(engine.evaluate(values))
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    print(json.dumps({
+        'rules': rules,
+        'coins': coins,
+        'updates': updates,
+        'register_ms': round(register * 1000, 1),
+        'evaluate_ms': {
+            'p50': round(timings[len(timings) // 2] * 1000, 3),
+            'max': round(timings[-1] * 1000, 3)
+        },
+        'fired_per_update': round(fired / updates, 1)
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:4]))
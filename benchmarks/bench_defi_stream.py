@@ -0,0 +1,77 @@
+"""Compara response.json() + fatia com a seleção em streaming dos protocolos DeFi
+
+Uso: python benchmarks/bench_defi_stream.py [protocolos] [repetições]
+Imprime um JSON com o pico de memória e o tempo de cada abordagem.
+"""
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from defi import TopProtocols, compact_protocol, iter_json_array  # noqa: E402
+
+CHAINS = ['Ethereum', 'BSC', 'Solana', 'Arbitrum', 'Base', 'Polygon', 'Avalanche', 'Optimism', 'Tron', 'Bitcoin']
+CATEGORIES = ['Dexes', 'Lending', 'Liquid Staking', 'Bridge', 'Yield', 'CDP', 'Derivatives', 'Restaking']
+
+
+def fake_protocols(count):
+    """Itens no formato de https://api.llama.fi/protocols"""
+    items = []
+    for i in range(count):
+        chains = random.sample(CHAINS, random.randint(1, 5))
+        tvl = random.lognormvariate(15, 3)
+        items.append({
+            'id': str(i), 'name': f'Protocol {i}', 'symbol': f'P{i}', 'url': f'https://protocol{i}.example',
+            'description': f'Protocol {i} is a decentralized protocol. ' * 3,
+            'chain': chains[0] if len(chains) == 1 else 'Multi-Chain', 'logo': f'https://icons.llama.fi/p{i}.jpg',
+            'category': random.choice(CATEGORIES), 'chains': chains, 'module': f'p{i}/index.js',
+            'twitter': f'p{i}', 'oracles': ['Chainlink'], 'slug': f'protocol-{i}', 'tvl': tvl,
+            'chainTvls': {chain: tvl / len(chains) for chain in chains},
+            'change_1h': random.uniform(-1, 1), 'change_1d': random.uniform(-5, 5), 'change_7d': random.uniform(-20, 20)
+        })
+    return items
+
+
+def full_parse(raw):
+    protocols = json.loads(raw)
+    return [compact_protocol(p) for p in sorted(protocols, key=lambda p: p['tvl'], reverse=True)[:10]]
+
+
+def streaming(raw, chunk_size=64 * 1024):
+    top = TopProtocols(50)
+    for protocol in iter_json_array(raw[i:i + chunk_size] for i in range(0, len(raw), chunk_size)):
+        top.add(protocol)
+    return top.build()
+
+
+def measure(fn, raw, repeat):
+    tracemalloc.start()
+    fn(raw)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(raw)
+        timings.append(time.perf_counter() - start)
+    return {'peak_memory_mb': round(peak / 2 ** 20, 2), 'time_ms': round(min(timings) * 1000, 1)}
+
+
+def main(count=4000, repeat=5):
+    random.seed(0)
+    raw = json.dumps(fake_protocols(count)).encode('utf-8')
+    print(json.dumps({
+        'protocols': count,
+        'payload_mb': round(len(raw) / 2 ** 20, 2),
+        # O corpo inteiro (raw) já está em memória nos dois casos e não entra no pico
+        'response_json_top10': measure(full_parse, raw, repeat),
+        'streaming_index': measure(streaming, raw, repeat)
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
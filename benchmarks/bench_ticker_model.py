@@ -0,0 +1,105 @@
+"""Compara memória e tempo de serialização: dicts do CoinGecko x modelo Ticker
+
+Uso: python benchmarks/bench_ticker_model.py [moedas] [repetições]
+Imprime um JSON com os resultados.
+"""
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from snapshot import EncodedPayload, Snapshot, encode_json  # noqa: E402
+from tickers import load_tickers  # noqa: E402
+
+
+def fake_markets(count, sparkline=True):
+    """Itens no formato de /coins/markets (com os campos que o modelo descarta)"""
+    items = []
+    for i in range(count):
+        price = random.uniform(0.01, 60000)
+        item = {
+            'id': f'coin-{i}', 'symbol': f'c{i}', 'name': f'Coin {i}',
+            'image': f'https://assets.coingecko.com/coins/images/{i}/large/coin.png',
+            'current_price': price, 'market_cap': price * 1e7, 'market_cap_rank': i + 1,
+            'fully_diluted_valuation': price * 2e7, 'total_volume': price * 1e5,
+            'high_24h': price * 1.02, 'low_24h': price * 0.98, 'price_change_24h': price * 0.01,
+            'price_change_percentage_24h': 1.0, 'market_cap_change_24h': price * 1e5,
+            'market_cap_change_percentage_24h': 1.0, 'circulating_supply': 1e7, 'total_supply': 2e7,
+            'max_supply': None, 'ath': price * 2, 'ath_change_percentage': -50.0,
+            'ath_date': '2021-11-10T14:24:11.849Z', 'atl': price / 10, 'atl_change_percentage': 900.0,
+            'atl_date': '2015-10-20T00:00:00.000Z', 'roi': None, 'last_updated': '2026-10-16T10:00:00.000Z',
+            'price_change_percentage_1h_in_currency': 0.1, 'price_change_percentage_24h_in_currency': 1.0,
+            'price_change_percentage_7d_in_currency': 5.0, 'price_change_percentage_30d_in_currency': 10.0
+        }
+        if sparkline:
+            item['sparkline_in_7d'] = {'price': [price * random.uniform(0.9, 1.1) for _ in range(168)]}
+        items.append(item)
+    return items
+
+
+def measure_memory(build):
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def scenario(count, repeat, sparkline):
+    raw = json.dumps(fake_markets(count, sparkline))
+    dicts, dict_bytes = measure_memory(lambda: json.loads(raw))
+    tickers, ticker_bytes = measure_memory(lambda: load_tickers(json.loads(raw)))
+
+    # Nova geração em que só outra seção mudou (ex.: Fear & Greed)
+    previous = Snapshot.build(dashboard_views(tickers, 0), 1)
+    views = dashboard_views(tickers, 1)
+
+    return {
+        'memory_per_coin_bytes': {
+            'dict': round(dict_bytes / count),
+            'ticker': round(ticker_bytes / count)
+        },
+        'serialize_ms': {
+            'dict': round(best_of(lambda: encode_json(dicts), repeat) * 1000, 3),
+            'ticker': round(best_of(lambda: encode_json(tickers), repeat) * 1000, 3)
+        },
+        'dashboard_rebuild_ms': {
+            'full_encode': round(best_of(lambda: EncodedPayload(views['dashboard'], None), repeat) * 1000, 3),
+            'from_sections': round(best_of(lambda: Snapshot.build(views, 2, previous), repeat) * 1000, 3)
+        },
+        'same_output': json.loads(encode_json(tickers)) == json.loads(encode_json(dicts))
+    }
+
+
+def dashboard_views(tickers, fear_greed):
+    views = {'coingecko_data': tickers, 'fear_greed': {'value': fear_greed}}
+    views['dashboard'] = dict(views)
+    return views
+
+
+def main(count=500, repeat=20):
+    random.seed(0)
+    results = {
+        'coins': count,
+        # Ciclo normal: o sparkline só vem na semeadura do histórico
+        'without_sparkline': scenario(count, repeat, sparkline=False),
+        'with_sparkline': scenario(count, repeat, sparkline=True)
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,334 @@
+"""Benchmarks e teste de carga do dashboard contra o stub das APIs externas
+
+Mede o tempo de update_cache(), o crescimento de memória ao longo de vários
+ciclos e a latência (percentis) e vazão de cada endpoint com clientes
+concorrentes, no servidor do Flask, no gunicorn e no uvicorn (asgi.py, com
+workers do uvicorn sob o gunicorn). Também
+mede quantas conexões SSE cada servidor sustenta e a latência do
+/api/dashboard-data com elas abertas. Imprime JSON:
+
+    python benchmarks/run_benchmarks.py [--cycles 30] [--clients 16] [--duration 10]
+                                        [--servers flask,gunicorn,uvicorn] [--streams 500]
+                                        [--output resultado.json]
+"""
+import argparse
+import http.client
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_upstream import start_stub  # noqa: E402
+
+ENDPOINTS = [
+    '/api/dashboard-data',
+    '/api/tickers',
+    '/api/tickers?fields=id,current_price&layout=columns',
+    '/api/tickers/bitcoin',
+    '/api/news?q=bitcoin',
+    '/api/history/bitcoin',
+    '/api/status',
+    '/'
+]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def rss_bytes():
+    """Memória residente do processo atual"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def app_environment(stub_url, data_dir):
+    return {
+        **os.environ,
+        'CRYPTO_UPSTREAM_OVERRIDES': f'*={stub_url}',
+        'CRYPTO_DASHBOARD_DATA_DIR': data_dir,
+        # Mede a capacidade de SSE também nos servidores WSGI (desativado por padrão neles)
+        'CRYPTO_DASHBOARD_SSE': '1',
+        'PYTHONPATH': ROOT
+    }
+
+
+def cycles_worker(cycles):
+    """Executado num subprocesso: importa o app e roda update_cache() várias vezes"""
+    import app
+    from upstream import UpstreamGovernor
+
+    # O stub não tem rate limit; os limites reais só somariam esperas ao tempo medido
+    app.governor = UpstreamGovernor({}, default_limit=(10000, 10000))
+    deadline = time.time() + 60
+    while app.cache.get('last_update', {}).get('stale') and time.time() < deadline:
+        time.sleep(0.1)
+
+    timings, samples = [], []
+    baseline = rss_bytes()
+    for _ in range(cycles):
+        app.registry.reset()
+        start = time.perf_counter()
+        app.update_cache()
+        timings.append(time.perf_counter() - start)
+        samples.append(rss_bytes())
+
+    timings.sort()
+    half = samples[len(samples) // 2:] or samples
+    return {
+        'update_cache_ms': {
+            'cycles': cycles,
+            'min': round(timings[0] * 1000, 2),
+            'p50': round(percentile(timings, 0.5) * 1000, 2),
+            'p90': round(percentile(timings, 0.9) * 1000, 2),
+            'max': round(timings[-1] * 1000, 2)
+        },
+        'memory': {
+            'rss_start_mb': round(baseline / 2 ** 20, 2),
+            'rss_end_mb': round(samples[-1] / 2 ** 20, 2),
+            'growth_mb': round((samples[-1] - baseline) / 2 ** 20, 2),
+            # Crescimento na segunda metade da execução (depois do aquecimento dos caches)
+            'growth_per_cycle_kb_steady': round((half[-1] - half[0]) / max(len(half) - 1, 1) / 1024, 2)
+        }
+    }
+
+
+def run_cycles(stub_url, cycles):
+    with tempfile.TemporaryDirectory(prefix='bench-data-') as data_dir:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--worker-cycles', str(cycles)],
+            env=app_environment(stub_url, data_dir), cwd=ROOT, capture_output=True, text=True, timeout=1800
+        )
+    if output.returncode != 0:
+        return {'error': output.stderr.strip().splitlines()[-1:]}
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def server_command(kind, port, workers):
+    if kind == 'flask':
+        return [sys.executable, '-c', f"import app; app.app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    if kind == 'gunicorn':
+        return ['gunicorn', '-w', str(workers), '--threads', '4', '-b', f'127.0.0.1:{port}', 'app:app']
+    if kind == 'uvicorn':
+        # Workers do uvicorn sob o gunicorn: o socket do `uvicorn --workers` fica sem TCP_NODELAY
+        # e cada resposta (cabeçalho e corpo em escritas separadas) espera o ACK atrasado do cliente
+        return ['gunicorn', '-w', str(workers), '-k', 'uvicorn.workers.UvicornWorker', '-b', f'127.0.0.1:{port}', 'asgi:app']
+    raise ValueError(f'Servidor desconhecido: {kind}')
+
+
+def wait_ready(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/api/ready')
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def load_endpoint(port, path, clients, duration):
+    """Clientes concorrentes com conexões keep-alive pedindo o mesmo endpoint"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        local = []
+        failures = 0
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path, headers={'Accept-Encoding': 'gzip'})
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    failures += 1
+            except (OSError, http.client.HTTPException):
+                failures += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+                continue
+            local.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failures
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'latency_ms': {
+            'p50': ms(percentile(latencies, 0.5)),
+            'p90': ms(percentile(latencies, 0.9)),
+            'p99': ms(percentile(latencies, 0.99)),
+            'max': ms(latencies[-1] if latencies else None)
+        }
+    }
+
+
+def open_streams(port, count, timeout=10):
+    """Abre count conexões em /api/stream; retorna os sockets cujo servidor já respondeu 200"""
+    pending = []
+    for _ in range(count):
+        try:
+            sock = socket.create_connection(('127.0.0.1', port), timeout=timeout)
+            sock.sendall(b'GET /api/stream HTTP/1.1\r\nHost: 127.0.0.1\r\nAccept: text/event-stream\r\n\r\n')
+            pending.append(sock)
+        except OSError:
+            break
+
+    established = []
+    deadline = time.monotonic() + timeout
+    for sock in pending:
+        # Conexões na fila de accept sem thread/corrotina livre não recebem o cabeçalho
+        head = b''
+        try:
+            while b'\r\n\r\n' not in head:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                sock.settimeout(remaining)
+                chunk = sock.recv(4096)
+                if not chunk:
+                    break
+                head += chunk
+        except OSError:
+            pass
+        if head.startswith(b'HTTP/1.1 200'):
+            established.append(sock)
+        else:
+            sock.close()
+    return established
+
+
+def stream_capacity(port, streams, clients, duration):
+    """Conexões SSE sustentadas e latência do /api/dashboard-data enquanto elas ficam abertas"""
+    established = open_streams(port, streams)
+    try:
+        return {
+            'requested': streams,
+            'established': len(established),
+            '/api/dashboard-data': load_endpoint(port, '/api/dashboard-data', clients, duration)
+        }
+    finally:
+        for sock in established:
+            sock.close()
+
+
+def run_server(kind, stub_url, clients, duration, workers, streams):
+    if kind in ('gunicorn', 'uvicorn') and not shutil.which('gunicorn'):
+        return {'skipped': 'gunicorn não instalado'}
+    if kind == 'uvicorn' and importlib.util.find_spec('uvicorn') is None:
+        return {'skipped': 'uvicorn não instalado'}
+    port = free_port()
+    with tempfile.TemporaryDirectory(prefix='bench-data-') as data_dir:
+        process = subprocess.Popen(
+            server_command(kind, port, workers), env=app_environment(stub_url, data_dir), cwd=ROOT,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            if not wait_ready(port):
+                return {'error': 'servidor não ficou pronto'}
+            results = {path: load_endpoint(port, path, clients, duration) for path in ENDPOINTS}
+            if streams:
+                results['sse_capacity'] = stream_capacity(port, streams, clients, duration)
+            return results
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cycles', type=int, default=30, help='ciclos de update_cache() medidos')
+    parser.add_argument('--clients', type=int, default=16, help='clientes concorrentes por endpoint')
+    parser.add_argument('--duration', type=float, default=10, help='segundos de carga por endpoint')
+    parser.add_argument('--servers', default='flask,gunicorn,uvicorn')
+    parser.add_argument('--workers', type=int, default=2, help='workers do gunicorn e do uvicorn')
+    parser.add_argument('--streams', type=int, default=500, help='conexões SSE abertas no teste de capacidade (0 desativa)')
+    parser.add_argument('--delay', type=float, default=0.0, help='latência simulada do stub (segundos)')
+    parser.add_argument('--output', help='grava o JSON neste arquivo além de imprimir')
+    parser.add_argument('--worker-cycles', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker_cycles:
+        print(json.dumps(cycles_worker(args.worker_cycles)))
+        return
+
+    stub, stub_url = start_stub(delay=args.delay)
+    results = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'params': {k: v for k, v in vars(args).items() if k not in ('output', 'worker_cycles')}
+        },
+        'cycles': run_cycles(stub_url, args.cycles),
+        'servers': {
+            kind: run_server(kind, stub_url, args.clients, args.duration, args.workers, args.streams)
+            for kind in args.servers.split(',') if kind
+        }
+    }
+    stub.shutdown()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
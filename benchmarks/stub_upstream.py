@@ -0,0 +1,147 @@
+"""Servidor local que responde no lugar das APIs externas usando fixtures gravadas
+
+O app é apontado para ele com CRYPTO_UPSTREAM_OVERRIDES='*=http://127.0.0.1:PORTA';
+as URLs chegam como /<host>/<caminho>. Uso:
+
+    python benchmarks/stub_upstream.py --port 8999 [--delay 0.05]
+    python benchmarks/stub_upstream.py --record   # regrava as fixtures a partir das APIs reais
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# (host, caminho) -> (arquivo da fixture, URL real usada em --record)
+ROUTES = {
+    ('api.coingecko.com', '/api/v3/coins/markets'): (
+        'coingecko_markets.json',
+        'https://api.coingecko.com/api/v3/coins/markets?vs_currency=usd&order=market_cap_desc'
+        '&per_page=50&page=1&sparkline=true&price_change_percentage=1h,24h,7d,30d'),
+    ('api.coingecko.com', '/api/v3/global'): ('coingecko_global.json', 'https://api.coingecko.com/api/v3/global'),
+    ('api.coingecko.com', '/api/v3/search/trending'): (
+        'coingecko_trending.json', 'https://api.coingecko.com/api/v3/search/trending'),
+    ('api.alternative.me', '/fng/'): ('fear_greed.json', 'https://api.alternative.me/fng/'),
+    ('api.exchangerate-api.com', '/v4/latest/USD'): (
+        'exchange_rates.json', 'https://api.exchangerate-api.com/v4/latest/USD'),
+    ('api.llama.fi', '/protocols'): ('llama_protocols.json', 'https://api.llama.fi/protocols'),
+    ('min-api.cryptocompare.com', '/data/v2/news/'): (
+        'cryptocompare_news.json', 'https://min-api.cryptocompare.com/data/v2/news/?lang=EN&sortOrder=latest')
+}
+# Qualquer outro host é tratado como feed RSS
+RSS_FIXTURE = ('rss.xml', 'https://cointelegraph.com/rss')
+
+
+class Fixtures:
+    """Fixtures carregadas em memória; tickers desconhecidos são gerados a partir das gravadas"""
+
+    def __init__(self, directory=FIXTURES_DIR):
+        self.files = {}
+        for name in os.listdir(directory):
+            with open(os.path.join(directory, name), 'rb') as f:
+                self.files[name] = f.read()
+        self.markets = json.loads(self.files['coingecko_markets.json'])
+        self.rss = self.files[RSS_FIXTURE[0]]
+        self.rss_etag = '"' + hashlib.sha1(self.rss).hexdigest()[:16] + '"'
+
+    def market_tickers(self, ids, sparkline):
+        """Tickers pedidos, com variação de preço a cada chamada (como o mercado real)"""
+        by_id = {ticker['id']: ticker for ticker in self.markets}
+        tickers = []
+        for i, coin in enumerate(ids):
+            template = by_id.get(coin) or self.markets[i % len(self.markets)]
+            ticker = dict(template, id=coin)
+            if coin not in by_id:
+                ticker['symbol'] = coin[:5]
+                ticker['name'] = coin.replace('-', ' ').title()
+            if ticker.get('current_price'):
+                ticker['current_price'] *= random.uniform(0.995, 1.005)
+            ticker['last_updated'] = time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime())
+            if not sparkline:
+                ticker.pop('sparkline_in_7d', None)
+            tickers.append(ticker)
+        return tickers
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    fixtures = None
+    delay = 0.0
+
+    def do_GET(self):
+        if self.delay:
+            time.sleep(self.delay)
+        parts = urlsplit(self.path)
+        host, _, path = parts.path.lstrip('/').partition('/')
+        path = '/' + path
+        query = parse_qs(parts.query)
+
+        route = ROUTES.get((host, path))
+        if route is None:
+            if host.startswith('api.'):
+                return self._send(404, b'{"error":"not found"}', 'application/json')
+            if self.headers.get('If-None-Match') == self.fixtures.rss_etag:
+                return self._send(304, b'', 'application/rss+xml')
+            return self._send(200, self.fixtures.rss, 'application/rss+xml', {'ETag': self.fixtures.rss_etag})
+
+        if path == '/api/v3/coins/markets':
+            ids = [coin for coin in query.get('ids', [''])[0].split(',') if coin]
+            sparkline = query.get('sparkline', ['false'])[0].lower() == 'true'
+            body = json.dumps(self.fixtures.market_tickers(ids, sparkline)).encode('utf-8')
+        else:
+            body = self.fixtures.files[route[0]]
+        self._send(200, body, 'application/json')
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(port=0, delay=0.0):
+    """Inicia o stub numa thread; retorna (servidor, URL base)"""
+    handler = type('Handler', (StubHandler,), {'fixtures': Fixtures(), 'delay': delay})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def record():
+    """Regrava as fixtures a partir das APIs reais"""
+    import requests
+
+    for name, url in list(ROUTES.values()) + [RSS_FIXTURE]:
+        response = requests.get(url, timeout=30, headers={'User-Agent': 'CryptoDashboard/1.0'})
+        response.raise_for_status()
+        with open(os.path.join(FIXTURES_DIR, name), 'wb') as f:
+            f.write(response.content)
+        print(f'{name}: {len(response.content)} bytes')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8999)
+    parser.add_argument('--delay', type=float, default=0.0, help='latência simulada por resposta (segundos)')
+    parser.add_argument('--record', action='store_true')
+    args = parser.parse_args()
+    if args.record:
+        record()
+    else:
+        server, url = start_stub(args.port, args.delay)
+        print(f'Stub das APIs em {url} (CRYPTO_UPSTREAM_OVERRIDES="*={url}")')
+        threading.Event().wait()
@@ -0,0 +1,88 @@
+import threading
+import time
+from types import MappingProxyType
+
+
+class CacheGeneration:
+    """Geração imutável e completa do cache
+
+    Os valores nunca são alterados depois de publicados: quem escreve sempre
+    cria novos objetos e publica uma nova geração.
+    """
+
+    __slots__ = ('data', 'version', 'updated_at')
+
+    def __init__(self, data, version, updated_at):
+        self.data = MappingProxyType(data)
+        self.version = version
+        self.updated_at = MappingProxyType(updated_at)
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def age(self, key):
+        """Segundos desde a última atualização da chave (None se nunca atualizada)"""
+        updated = self.updated_at.get(key)
+        return None if updated is None else time.time() - updated
+
+
+class CacheStore:
+    """Cache versionado copy-on-write: leituras sem lock, escritas publicadas atomicamente"""
+
+    def __init__(self, initial=None):
+        self._write_lock = threading.Lock()
+        self._generation = CacheGeneration(dict(initial or {}), 0, {})
+
+    @property
+    def current(self):
+        """Geração atual; a referência é lida atomicamente, sem lock"""
+        return self._generation
+
+    @property
+    def version(self):
+        return self._generation.version
+
+    def get(self, key, default=None):
+        return self._generation.get(key, default)
+
+    def update(self, fn):
+        """Publica uma nova geração com as alterações retornadas por fn(geração atual)"""
+        with self._write_lock:
+            current = self._generation
+            changes = fn(current)
+            if not changes:
+                return current
+            now = time.time()
+            data = dict(current.data)
+            data.update(changes)
+            updated_at = dict(current.updated_at)
+            updated_at.update(dict.fromkeys(changes, now))
+            self._generation = CacheGeneration(data, current.version + 1, updated_at)
+            return self._generation
+
+    def restore(self, entries):
+        """Publica valores carregados do disco preservando seus timestamps: {chave: (valor, updated_at)}"""
+        with self._write_lock:
+            current = self._generation
+            data = dict(current.data)
+            updated_at = dict(current.updated_at)
+            for key, (value, timestamp) in entries.items():
+                data[key] = value
+                updated_at[key] = timestamp
+            self._generation = CacheGeneration(data, current.version + 1, updated_at)
+            return self._generation
+
+    def install(self, version, data, updated_at):
+        """Substitui a geração inteira por uma recebida de outro processo"""
+        with self._write_lock:
+            if version == self._generation.version:
+                return self._generation
+            self._generation = CacheGeneration(dict(data), version, dict(updated_at))
+            return self._generation
+
+    def publish(self, changes):
+        """Publica uma nova geração com as chaves informadas substituídas"""
+        return self.update(lambda current: changes)
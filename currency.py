@@ -0,0 +1,63 @@
+from array import array
+from operator import attrgetter
+
+import numpy as np
+
+from tickers import FIELDS, Ticker, get_fields
+
+BASE_CURRENCY = 'usd'  # Moeda em que o CoinGecko é consultado
+
+# Campos de Ticker em valor monetário (os percentuais não mudam com a moeda)
+MONETARY_FIELDS = (
+    'current_price', 'market_cap', 'fully_diluted_valuation', 'total_volume', 'high_24h', 'low_24h',
+    'price_change_24h', 'market_cap_change_24h', 'ath', 'atl'
+)
+MONETARY_GLOBAL_FIELDS = ('total_market_cap', 'total_volume_24h')
+get_monetary = attrgetter(*MONETARY_FIELDS)
+MONETARY_INDEX = [FIELDS.index(field) for field in MONETARY_FIELDS]
+
+
+def currency_rate(currency, exchange_rates):
+    """Cotação USD -> moeda a partir das taxas em cache ({'USD_BRL': ...}); None se indisponível"""
+    if currency == BASE_CURRENCY:
+        return 1.0
+    rate = (exchange_rates or {}).get(f'USD_{currency.upper()}')
+    return float(rate) if rate else None
+
+
+def convert_tickers(tickers, rate):
+    """Novos Tickers com valores e sparklines multiplicados pela cotação, numa única operação vetorizada"""
+    if rate == 1.0 or not tickers:
+        return tickers
+
+    # None vira NaN na matriz e volta a ser None na saída
+    values = np.array([get_monetary(ticker) for ticker in tickers], dtype=float) * rate
+    converted = values.astype(object)
+    converted[np.isnan(values)] = None
+
+    # Todos os sparklines concatenados, convertidos de uma vez e fatiados de volta
+    lengths = [len(ticker.sparkline) if ticker.sparkline is not None else 0 for ticker in tickers]
+    prices = np.concatenate([np.frombuffer(ticker.sparkline, dtype=float)
+                             for ticker in tickers if ticker.sparkline is not None] or [np.empty(0)]) * rate
+    offsets = np.cumsum([0] + lengths)
+
+    result = []
+    for i, (ticker, row) in enumerate(zip(tickers, converted.tolist())):
+        values = list(get_fields(ticker))
+        for index, value in zip(MONETARY_INDEX, row):
+            values[index] = value
+        sparkline = None
+        if ticker.sparkline is not None:
+            sparkline = array('d')
+            sparkline.frombytes(prices[offsets[i]:offsets[i + 1]].tobytes())
+        result.append(Ticker(**dict(zip(FIELDS, values)), sparkline=sparkline))
+    return result
+
+
+def convert_global_metrics(metrics, rate):
+    if rate == 1.0 or not metrics:
+        return metrics
+    return {
+        **metrics,
+        **{field: metrics[field] * rate for field in MONETARY_GLOBAL_FIELDS if metrics.get(field) is not None}
+    }
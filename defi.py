@@ -0,0 +1,231 @@
+import codecs
+import heapq
+import itertools
+import json
+import logging
+import os
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+ANY = '*'  # Curinga de chain/categoria nas chaves do índice
+_decoder = json.JSONDecoder()
+_whitespace = ' \t\n\r'
+
+
+def iter_json_array(chunks):
+    """Itera os elementos de um array JSON de nível superior lido em pedaços de bytes
+
+    Só o elemento em leitura fica no buffer: cada elemento é decodificado
+    assim que chega (raw_decode, em C) e descartado pelo chamador, em vez de
+    montar a lista inteira na memória como response.json().
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    pos = 0
+    started = False
+    chunks = iter(chunks)
+    eof = False
+
+    while True:
+        # Pula espaços e separadores até o próximo elemento
+        while pos < len(buffer) and buffer[pos] in _whitespace:
+            pos += 1
+        if pos < len(buffer):
+            char = buffer[pos]
+            if not started:
+                if char != '[':
+                    raise ValueError('O JSON não é um array')
+                started = True
+                pos += 1
+                continue
+            if char == ',':
+                pos += 1
+                continue
+            if char == ']':
+                return
+            try:
+                value, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                end = None
+            if end is not None:
+                # O elemento só está completo se vier seguido de ',' ou ']' (números podem estar cortados)
+                after = end
+                while after < len(buffer) and buffer[after] in _whitespace:
+                    after += 1
+                if after < len(buffer) and buffer[after] in ',]':
+                    yield value
+                    pos = end
+                    continue
+                if eof:
+                    raise ValueError('JSON inválido após o elemento')
+        if eof:
+            raise ValueError('Array JSON incompleto')
+
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+            buffer = buffer[pos:] + decoder.decode(b'', final=True)
+        else:
+            buffer = buffer[pos:] + decoder.decode(chunk)
+        pos = 0
+
+
+def compact_protocol(protocol):
+    """Campos do protocolo usados pelo dashboard e pela API"""
+    return {
+        'name': protocol['name'],
+        'tvl': protocol['tvl'],
+        'chain': protocol.get('chain', 'Multi-Chain'),
+        'category': protocol.get('category', 'DeFi'),
+        'change_1d': protocol.get('change_1d', 0),
+        'logo': protocol.get('logo', '')
+    }
+
+
+def index_key(chain=None, category=None):
+    return f"{(chain or ANY).lower()}|{(category or ANY).lower()}"
+
+
+class TopProtocols:
+    """Seleciona, numa única passada, os `depth` maiores TVLs de cada chain, categoria e par
+
+    Cada chave tem um min-heap limitado a `depth` itens, então a memória não
+    depende do total de protocolos. Nos filtros por chain o ranking usa o
+    TVL do protocolo naquela chain (chainTvls).
+    """
+
+    def __init__(self, depth):
+        self.depth = depth
+        self.heaps = {}
+        self.seen = 0
+        self._seq = itertools.count()
+        self._keys = {}  # (chain, categoria) -> chave do índice (evita formatar a string por protocolo)
+
+    def _key(self, chain, category):
+        key = self._keys.get((chain, category))
+        if key is None:
+            key = self._keys[(chain, category)] = index_key(chain, category)
+        return key
+
+    def _push(self, key, score, entry):
+        heap = self.heaps.get(key)
+        if heap is None:
+            heap = self.heaps[key] = []
+        item = (score, -next(self._seq), entry, score)
+        if len(heap) < self.depth:
+            heapq.heappush(heap, item)
+        elif score > heap[0][0]:
+            heapq.heapreplace(heap, item)
+
+    def add(self, protocol):
+        if not isinstance(protocol, dict):
+            return
+        tvl = protocol.get('tvl')
+        if not isinstance(tvl, (int, float)) or not protocol.get('name'):
+            return
+        self.seen += 1
+        category = protocol.get('category') or 'DeFi'
+        entry = None
+        # O dict compacto só é criado se o protocolo entrar em algum heap
+        keys = [(self._key(None, None), tvl), (self._key(None, category), tvl)]
+        chain_tvls = protocol.get('chainTvls') or {}
+        for chain in protocol.get('chains') or [protocol.get('chain') or 'Multi-Chain']:
+            score = chain_tvls.get(chain, tvl)
+            if not isinstance(score, (int, float)):
+                score = tvl
+            keys.append((self._key(chain, None), score))
+            keys.append((self._key(chain, category), score))
+        for key, score in keys:
+            heap = self.heaps.get(key)
+            if heap is not None and len(heap) >= self.depth and score <= heap[0][0]:
+                continue
+            if entry is None:
+                entry = compact_protocol(protocol)
+            self._push(key, score, entry)
+
+    def build(self):
+        """Índice compacto: tabela única de protocolos + posições ordenadas por TVL em cada chave"""
+        positions = {}
+        protocols = []
+        index = {}
+        for key, heap in self.heaps.items():
+            ranked = []
+            for _, _, entry, score in sorted(heap, reverse=True):
+                position = positions.get(id(entry))
+                if position is None:
+                    position = positions[id(entry)] = len(protocols)
+                    protocols.append(entry)
+                ranked.append([position, score])
+            index[key] = ranked
+        return {'protocols': protocols, 'index': index, 'total': self.seen}
+
+
+class DefiIndex:
+    """Índice de protocolos DeFi por chain/categoria compartilhado entre os workers
+
+    O atualizador grava o índice num arquivo com rename atômico; os demais
+    processos o recarregam quando o stat do arquivo muda.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._data = {'protocols': [], 'index': {}, 'total': 0}
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def publish(self, data):
+        """Substitui o índice em memória e no disco"""
+        self._data = data
+        directory = os.path.dirname(self.path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.defi-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            os.unlink(tmp_path)
+            logger.error(f"Erro ao gravar índice DeFi: {e}")
+            return
+        with self._lock:
+            self._signature = self._stat()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _reload_if_changed(self):
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            try:
+                with open(self.path, 'rb') as f:
+                    self._data = json.loads(f.read())
+            except (OSError, ValueError) as e:
+                logger.error(f"Erro ao ler índice DeFi {self.path}: {e}")
+            self._signature = signature
+
+    def query(self, chain=None, category=None, limit=10):
+        """Maiores protocolos por TVL (na chain, se filtrada); None se a combinação não existe"""
+        self._reload_if_changed()
+        data = self._data
+        ranked = data['index'].get(index_key(chain, category))
+        if ranked is None:
+            return None
+        protocols = data['protocols']
+        items = []
+        for position, score in ranked[:limit]:
+            item = protocols[position]
+            if chain:
+                item = {**item, 'chain_tvl': score}
+            items.append(item)
+        return items
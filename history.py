@@ -0,0 +1,148 @@
+import os
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+# Registro em disco: timestamp (epoch) e preço, ambos float64
+RECORD = struct.Struct('<dd')
+SPARKLINE_SPAN = 7 * 24 * 3600  # O sparkline do CoinGecko cobre 7 dias
+
+
+class PriceSeries:
+    """Série de preços de uma moeda em arrays colunares (timestamps e preços)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.timestamps = array('d')
+        self.prices = array('d')
+        self._offset = 0
+
+    def sync(self):
+        """Lê do arquivo os registros anexados por outro processo"""
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return
+        size -= size % RECORD.size  # ignora registro parcial
+        if size <= self._offset:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            records = array('d')
+            records.frombytes(f.read(size - self._offset))
+        self.timestamps.extend(records[0::2])
+        self.prices.extend(records[1::2])
+        self._offset = size
+
+    def append(self, points):
+        """Anexa pontos (timestamp, preço) mais novos que o último armazenado"""
+        last = self.timestamps[-1] if self.timestamps else float('-inf')
+        new = [(ts, price) for ts, price in points if ts > last]
+        if not new:
+            return 0
+        with open(self.path, 'ab') as f:
+            f.write(b''.join(RECORD.pack(ts, price) for ts, price in new))
+        for ts, price in new:
+            self.timestamps.append(ts)
+            self.prices.append(price)
+        self._offset += len(new) * RECORD.size
+        return len(new)
+
+    def query(self, start, end, points):
+        """Pontos no intervalo [start, end], reduzidos por média em até `points` faixas"""
+        lo = bisect_left(self.timestamps, start)
+        hi = bisect_right(self.timestamps, end)
+        timestamps = self.timestamps[lo:hi]
+        prices = self.prices[lo:hi]
+        count = len(timestamps)
+        if count <= points:
+            return [[ts, price] for ts, price in zip(timestamps, prices)]
+
+        result = []
+        for i in range(points):
+            a = i * count // points
+            b = (i + 1) * count // points
+            result.append([timestamps[b - 1], sum(prices[a:b]) / (b - a)])
+        return result
+
+
+class PriceHistory:
+    """Histórico de preços local e append-only por moeda
+
+    Cada moeda tem um arquivo binário só de anexação; todos os workers leem
+    o mesmo arquivo incrementalmente, só o atualizador escreve.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._series = {}
+        self._seed_attempted = set()
+        self._lock = threading.Lock()
+
+    def series(self, coin):
+        with self._lock:
+            series = self._series.get(coin)
+            if series is None:
+                series = PriceSeries(os.path.join(self.directory, f'{coin}.bin'))
+                self._series[coin] = series
+            series.sync()
+            return series
+
+    def needs_seed(self, coins):
+        """True se alguma moeda ainda não tem histórico (precisa do sparkline)"""
+        return any(coin not in self._seed_attempted and not self.series(coin).timestamps for coin in coins)
+
+    def mark_seed_attempted(self, coins):
+        """Evita baixar o sparkline de novo para moedas que o upstream não retornou"""
+        self._seed_attempted.update(coins)
+
+    def ingest(self, tickers):
+        """Anexa o preço atual de cada ticker; usa o sparkline para semear moedas novas"""
+        added = 0
+        for ticker in tickers:
+            coin = ticker.get('id')
+            price = ticker.get('current_price')
+            if not coin or price is None:
+                continue
+
+            ts = parse_timestamp(ticker.get('last_updated')) or time.time()
+            series = self.series(coin)
+            points = []
+            sparkline = ticker.sparkline or ()
+            if not series.timestamps and len(sparkline) > 1:
+                step = SPARKLINE_SPAN / (len(sparkline) - 1)
+                start = ts - SPARKLINE_SPAN
+                # Pontos ausentes vêm como NaN no array do Ticker
+                points.extend((start + i * step, p) for i, p in enumerate(sparkline[:-1]) if p == p)
+            points.append((ts, float(price)))
+
+            with self._lock:
+                added += series.append(points)
+        return added
+
+    def has(self, coin):
+        return coin in self._series or os.path.exists(os.path.join(self.directory, f'{coin}.bin'))
+
+    def query(self, coin, start=None, end=None, points=200):
+        """Pontos da moeda no intervalo (padrão: últimos 7 dias); None se não houver histórico"""
+        if not self.has(coin):
+            return None
+        series = self.series(coin)
+        end = time.time() if end is None else end
+        start = end - SPARKLINE_SPAN if start is None else start
+        with self._lock:
+            return series.query(start, end, points)
+
+
+def parse_timestamp(value):
+    """Converte o ISO 8601 do CoinGecko ('2024-01-01T00:00:00.000Z') em epoch"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
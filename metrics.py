@@ -0,0 +1,195 @@
+import bisect
+import math
+import threading
+import weakref
+from collections import deque
+
+# Limites (segundos) padrão dos histogramas de latência
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+PRUNE_EVERY = 256  # Shards registrados entre varreduras das threads encerradas
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in pairs) + '}'
+
+
+class MetricsRegistry:
+    """Métricas no formato texto do Prometheus, sem lock no caminho de escrita
+
+    Cada thread incrementa apenas o seu próprio shard (um dict), então
+    contadores e histogramas não disputam lock; os shards só são somados
+    quando /metrics é lido. Shards novos entram numa deque sem lock, e os
+    de threads encerradas são incorporados a um acumulado a cada
+    PRUNE_EVERY registros (e na leitura), para que o servidor do Flask (uma
+    thread por requisição) não acumule shards sem scrape.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._shards = []  # (weakref da thread, shard) vivos na última varredura
+        self._pending = deque()  # shards registrados desde a última varredura
+        self._retired = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            # Referência fraca: o shard não mantém vivo o objeto Thread encerrado
+            self._pending.append((weakref.ref(threading.current_thread()), shard))
+            if len(self._pending) >= PRUNE_EVERY and self._lock.acquire(blocking=False):
+                try:
+                    self._prune()
+                finally:
+                    self._lock.release()
+        return shard
+
+    def _prune(self):
+        """Incorpora ao acumulado os shards de threads encerradas (chamado com self._lock)"""
+        while self._pending:
+            self._shards.append(self._pending.popleft())
+        live = []
+        for ref, shard in self._shards:
+            thread = ref()
+            if thread is not None and thread.is_alive():
+                live.append((ref, shard))
+            else:
+                # A thread não escreve mais: o shard pode ser incorporado sem cópia
+                self._merge(self._retired, shard)
+        self._shards = live
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self.register(Counter(self, name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(self, name, help, labels, buckets))
+
+    def gauge(self, name, help, labels, collect):
+        """Gauge calculado na leitura: collect() -> [(valores dos labels, valor)]"""
+        return self.register(Gauge(name, help, labels, collect))
+
+    def _merge(self, target, shard):
+        for key, value in shard.items():
+            if isinstance(value, list):
+                total = target.get(key)
+                if total is None:
+                    target[key] = list(value)
+                else:
+                    for i, v in enumerate(value):
+                        total[i] += v
+            else:
+                target[key] = target.get(key, 0) + value
+
+    def collect(self):
+        """Soma os shards de todas as threads: {(nome, valores dos labels): valor}"""
+        with self._lock:
+            self._prune()
+            totals = {}
+            self._merge(totals, self._retired)
+            for _, shard in self._shards:
+                # dict(shard)/list(valor) são cópias atômicas sob o GIL
+                self._merge(totals, {key: list(v) if isinstance(v, list) else v for key, v in dict(shard).items()})
+            metrics = list(self._metrics)
+        return metrics, totals
+
+    def render(self):
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)"""
+        metrics, totals = self.collect()
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.samples(totals))
+        return '\n'.join(lines) + '\n'
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, registry, name, help, labels=()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+
+    def inc(self, *label_values, amount=1):
+        key = (self.name, label_values)
+        shard = self.registry.shard()
+        shard[key] = shard.get(key, 0) + amount
+
+    def samples(self, totals):
+        for (name, values), value in sorted(totals.items(), key=lambda item: item[0][1]):
+            if name == self.name:
+                yield f'{name}{format_labels(self.labels, values)} {format_value(value)}'
+
+
+class Histogram:
+    """Histograma de buckets fixos; cada shard guarda [contagens..., soma]"""
+
+    type = 'histogram'
+
+    def __init__(self, registry, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *label_values):
+        key = (self.name, label_values)
+        shard = self.registry.shard()
+        counts = shard.get(key)
+        if counts is None:
+            counts = shard[key] = [0] * (len(self.buckets) + 2)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self, totals):
+        for (name, values), counts in sorted(totals.items(), key=lambda item: item[0][1]):
+            if name != self.name:
+                continue
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = format_labels(self.labels, values, [('le', format_value(float(bound)))])
+                yield f'{name}_bucket{labels} {cumulative}'
+            labels = format_labels(self.labels, values)
+            yield f'{name}_sum{labels} {format_value(counts[-1])}'
+            yield f'{name}_count{labels} {cumulative}'
+
+
+class Gauge:
+    type = 'gauge'
+
+    def __init__(self, name, help, labels, collect):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.collect = collect
+
+    def samples(self, totals):
+        for values, value in self.collect():
+            if value is not None:
+                yield f'{self.name}{format_labels(self.labels, values)} {format_value(value)}'
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def normalize_link(link):
+    """Normaliza a URL para deduplicar a mesma notícia vinda de fontes diferentes"""
+    parts = urlsplit(link.strip())
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not k.startswith('utm_')])
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower().removeprefix('www.'), path, query, ''))
+
+
+def link_hash(link):
+    return hashlib.sha1(normalize_link(link).encode('utf-8')).hexdigest()[:16]
+
+
+def published_timestamp(value):
+    """Data de publicação (RFC 822 dos feeds ou ISO 8601) como epoch, 0 se inválida"""
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return 0
+
+
+def tokenize(text):
+    return {token for token in TOKEN_PATTERN.findall(text.lower()) if len(token) > 1}
+
+
+class NewsIndex:
+    """Índice persistente de notícias com deduplicação, busca por palavra e por moeda
+
+    As notícias são gravadas num arquivo JSONL só de anexação; cada processo
+    reconstrói o índice invertido lendo o arquivo incrementalmente. As listas
+    de postagem são arrays ordenados de ids, então a busca intersecta por
+    bisseção a partir do cursor e só percorre o necessário para uma página.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.docs = []
+        self.by_hash = {}
+        self.terms = {}
+        self.coins = {}
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Indexa o arquivo existente (pode ser chamado em background na inicialização)"""
+        with self._lock:
+            self._sync()
+
+    def _index(self, doc):
+        doc_id = len(self.docs)
+        self.docs.append(doc)
+        self.by_hash[doc['id']] = doc_id
+        for token in tokenize(doc['title']):
+            self.terms.setdefault(token, array('I')).append(doc_id)
+        for coin in doc['coins']:
+            self.coins.setdefault(coin, array('I')).append(doc_id)
+
+    def _sync(self):
+        """Indexa as notícias anexadas ao arquivo desde a última leitura"""
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return
+        if size <= self._offset:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            chunk = f.read(size - self._offset)
+        complete = chunk.rfind(b'\n') + 1  # ignora linha parcial
+        for line in chunk[:complete].splitlines():
+            doc = json.loads(line)
+            if doc['id'] not in self.by_hash:
+                self._index(doc)
+        self._offset += complete
+
+    def add_many(self, items, coin_aliases):
+        """Indexa notícias novas (ignorando duplicadas); retorna quantas foram adicionadas"""
+        with self._lock:
+            self._sync()
+            new = []
+            seen = set()
+            for item in items:
+                if not item.get('link'):
+                    continue
+                doc_hash = link_hash(item['link'])
+                if doc_hash in self.by_hash or doc_hash in seen:
+                    continue
+                seen.add(doc_hash)
+                tokens = tokenize(item.get('title', ''))
+                coins = sorted({coin_aliases[token] for token in tokens if token in coin_aliases})
+                new.append({**item, 'id': doc_hash, 'coins': coins})
+            if not new:
+                return 0
+            # A busca devolve os ids mais altos primeiro: o lote entra da mais antiga para a mais recente
+            new.sort(key=lambda doc: published_timestamp(doc.get('published')))
+
+            data = b''.join(json.dumps(doc, ensure_ascii=False).encode('utf-8') + b'\n' for doc in new)
+            with open(self.path, 'ab') as f:
+                f.write(data)
+            for doc in new:
+                self._index(doc)
+            self._offset += len(data)
+            return len(new)
+
+    def search(self, query='', coin=None, cursor=None, limit=20):
+        """Notícias mais recentes primeiro; cursor é o id interno a partir do qual continuar"""
+        with self._lock:
+            self._sync()
+            postings = [self.terms.get(token) for token in tokenize(query)]
+            if coin:
+                postings.append(self.coins.get(coin.lower()))
+            if any(p is None for p in postings):
+                return {'items': [], 'next_cursor': None}
+
+            end = len(self.docs) if cursor is None else min(cursor, len(self.docs))
+            postings.sort(key=len)
+            results = []
+            if postings:
+                driver, others = postings[0], postings[1:]
+                i = bisect_left(driver, end) - 1
+                while i >= 0 and len(results) < limit + 1:
+                    doc_id = driver[i]
+                    if all(contains(other, doc_id) for other in others):
+                        results.append(doc_id)
+                    i -= 1
+            else:
+                results = list(range(end - 1, max(end - limit - 2, -1), -1))
+
+            page = results[:limit]
+            next_cursor = page[-1] if len(results) > limit else None
+            return {'items': [self.docs[doc_id] for doc_id in page], 'next_cursor': next_cursor}
+
+    def __len__(self):
+        return len(self.docs)
+
+
+def contains(posting, doc_id):
+    i = bisect_left(posting, doc_id)
+    return i < len(posting) and posting[i] == doc_id
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class TTLCache:
+    """LRU limitado com expiração por item"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Retorna (encontrado, valor)"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+            return True, value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CoinBatcher:
+    """Busca sob demanda de moedas fora do cache, com single-flight e agrupamento
+
+    Pedidos simultâneos da mesma moeda compartilham o mesmo Future; moedas
+    diferentes pedidas dentro de `window` segundos vão juntas numa única
+    chamada a fetch_batch(ids).
+    """
+
+    def __init__(self, fetch_batch, window=0.05, max_batch=100, maxsize=1000, ttl=60, miss_ttl=300):
+        self.fetch_batch = fetch_batch
+        self.window = window
+        self.max_batch = max_batch
+        self.miss_ttl = miss_ttl
+        self.cache = TTLCache(maxsize, ttl)
+        self.upstream_calls = 0
+        self._pending = {}  # id -> Future (na fila ou em voo)
+        self._queue = []
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def get(self, coin_id, timeout=15):
+        """Ticker da moeda, ou None se o upstream não a conhece"""
+        found, value = self.cache.get(coin_id)
+        if found:
+            return value
+
+        flush_now = False
+        with self._lock:
+            future = self._pending.get(coin_id)
+            if future is None:
+                future = Future()
+                self._pending[coin_id] = future
+                self._queue.append(coin_id)
+                if len(self._queue) >= self.max_batch:
+                    flush_now = True
+                elif self._timer is None:
+                    self._timer = threading.Timer(self.window, self._flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+        if flush_now:
+            self._flush()
+        return future.result(timeout)
+
+    def _flush(self):
+        with self._lock:
+            ids, self._queue = self._queue, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            futures = {coin_id: self._pending[coin_id] for coin_id in ids}
+            if ids:
+                self.upstream_calls += 1
+        if not ids:
+            return
+
+        try:
+            results = {ticker['id']: ticker for ticker in self.fetch_batch(ids)}
+        except Exception as e:
+            results, error = None, e
+
+        with self._lock:
+            for coin_id in ids:
+                self._pending.pop(coin_id, None)
+        for coin_id, future in futures.items():
+            if results is None:
+                future.set_exception(error)
+                continue
+            ticker = results.get(coin_id)
+            # Moedas desconhecidas também ficam em cache, por mais tempo, para não martelar o upstream
+            self.cache.set(coin_id, ticker, None if ticker is not None else self.miss_ttl)
+            future.set_result(ticker)
@@ -0,0 +1,79 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+
+from tickers import to_jsonable
+
+logger = logging.getLogger(__name__)
+
+# Cabeçalho: magic, timestamp da atualização (epoch), tamanho do corpo JSON
+HEADER = struct.Struct('<4sdI')
+MAGIC = b'CDS1'
+
+
+class SourceStore:
+    """Persistência em disco do último resultado bem-sucedido de cada fonte
+
+    Cada fonte fica num arquivo próprio (cabeçalho binário + JSON compacto),
+    gravado com fsync e rename atômico para sobreviver a quedas no meio da
+    escrita. A leitura usa mmap.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.cds')
+
+    def save(self, key, data, updated_at):
+        body = json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=to_jsonable).encode('utf-8')
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f'.{key}-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, updated_at, len(body)))
+                f.write(body)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        self._sync_directory()
+
+    def _sync_directory(self):
+        if not hasattr(os, 'O_DIRECTORY'):
+            return
+        fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def load(self, key):
+        """Retorna (dados, updated_at) da fonte, ou None se não houver arquivo válido"""
+        try:
+            with open(self._path(key), 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    magic, updated_at, size = HEADER.unpack_from(m)
+                    if magic != MAGIC or HEADER.size + size != len(m):
+                        raise ValueError('arquivo truncado ou formato desconhecido')
+                    data = json.loads(m[HEADER.size:])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, struct.error) as e:
+            logger.error(f"Erro ao carregar {key} do disco: {e}")
+            return None
+        return data, updated_at
+
+    def load_all(self, keys):
+        """Carrega todas as fontes persistidas: {chave: (dados, updated_at)}"""
+        entries = {}
+        for key in keys:
+            entry = self.load(key)
+            if entry is not None:
+                entries[key] = entry
+        return entries
@@ -0,0 +1,95 @@
+import json
+import threading
+from collections import deque
+
+from tickers import to_jsonable
+
+# Seções do dashboard que são listas com identificador próprio
+KEYED_SECTIONS = {
+    'coingecko_data': 'id',
+    'news': 'link'
+}
+
+
+def compute_delta(old, new):
+    """Diferença por seção entre duas views do dashboard
+
+    Tickers são enviados individualmente (alterados/removidos), notícias só
+    as novas e as demais seções inteiras quando mudarem.
+    """
+    sections = {}
+    for name, value in new.items():
+        previous = old.get(name)
+        if previous == value:
+            continue
+
+        id_field = KEYED_SECTIONS.get(name)
+        if id_field and isinstance(previous, list) and isinstance(value, list):
+            before = {item.get(id_field): item for item in previous}
+            after_ids = [item.get(id_field) for item in value]
+            remaining = set(after_ids)
+            sections[name] = {
+                'order': after_ids,
+                'upsert': [item for item in value if before.get(item.get(id_field)) != item],
+                'remove': [item_id for item_id in before if item_id not in remaining]
+            }
+        else:
+            sections[name] = {'replace': value}
+    return sections
+
+
+class DeltaBroadcaster:
+    """Distribui deltas do cache para assinantes SSE
+
+    Cada evento é codificado uma única vez e guardado num buffer circular
+    compartilhado; os assinantes só mantêm a última versão que receberam,
+    sem fila nem thread de envio por conexão.
+    """
+
+    def __init__(self, version=0, history=64):
+        self._cond = threading.Condition()
+        self._events = deque(maxlen=history)  # (versão base, versão, bytes)
+        self.version = version
+
+    def publish(self, base_version, version, sections):
+        """Registra o delta entre base_version e version e acorda os assinantes"""
+        payload = json.dumps({'base': base_version, 'version': version, 'sections': sections},
+                             separators=(',', ':'), ensure_ascii=False, default=to_jsonable)
+        event = f"id: {version}\nevent: delta\ndata: {payload}\n\n".encode('utf-8')
+        with self._cond:
+            self._events.append((base_version, version, event))
+            self.version = version
+            self._cond.notify_all()
+
+    def events_since(self, version):
+        """Eventos posteriores a version, ou None se o histórico não cobre o intervalo"""
+        with self._cond:
+            if version > self.version:
+                return None
+            pending = [e for e in self._events if e[1] > version]
+            if pending and pending[0][0] != version:
+                return None
+            return pending
+
+    def wait(self, version, timeout):
+        """Bloqueia até existir uma versão mais nova que version ou esgotar o timeout"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.version > version, timeout)
+
+    def stream(self, since, heartbeat=15):
+        """Gerador de bytes SSE a partir da versão since"""
+        yield b"retry: 5000\n\n"
+        version = since
+        while True:
+            events = self.events_since(version)
+            if events is None:
+                # Cliente muito atrasado: pede para recarregar o snapshot completo
+                yield f"id: {self.version}\nevent: reset\ndata: {{}}\n\n".encode('utf-8')
+                version = self.version
+                continue
+            for _, event_version, event in events:
+                yield event
+                version = event_version
+            if not events:
+                yield b": ping\n\n"
+            self.wait(version, heartbeat)
@@ -0,0 +1,103 @@
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Configuração padrão, usada quando não existe arquivo de fontes
+DEFAULT_CONFIG = {
+    'feed_concurrency': 16,
+    'coin_groups': [
+        {
+            'name': 'principais',
+            'fetcher': 'coingecko_markets',
+            'interval': 60,
+            'ids': ['bitcoin', 'ethereum', 'ripple', 'dogecoin', 'solana', 'cardano', 'polkadot', 'polygon']
+        }
+    ],
+    'feeds': [
+        {'source': 'CoinTelegraph', 'url': 'https://cointelegraph.com/rss', 'parser': 'rss', 'interval': 300, 'items': 3},
+        {'source': 'Decrypt', 'url': 'https://decrypt.co/feed', 'parser': 'rss', 'interval': 300, 'items': 3}
+    ]
+}
+
+MAX_IDS_LENGTH = 1500  # Tamanho máximo do parâmetro ids por requisição (limite de URL)
+MAX_PER_PAGE = 250  # Limite do CoinGecko para /coins/markets
+
+
+class SourceRegistry:
+    """Registro de grupos de moedas e feeds carregado de um arquivo de configuração
+
+    Cada grupo/feed declara o fetcher (ou parser) e o intervalo próprio; as
+    fontes do agregador consultam o registro para saber o que está vencido.
+    """
+
+    def __init__(self, config, fetchers=(), parsers=()):
+        self.feed_concurrency = config.get('feed_concurrency', DEFAULT_CONFIG['feed_concurrency'])
+        self.coin_groups = [dict(group) for group in config.get('coin_groups', [])]
+        self.feeds = [dict(feed) for feed in config.get('feeds', [])]
+
+        for group in self.coin_groups:
+            group.setdefault('fetcher', 'coingecko_markets')
+            group.setdefault('interval', 60)
+            if fetchers and group['fetcher'] not in fetchers:
+                raise ValueError(f"Fetcher desconhecido no grupo {group.get('name')}: {group['fetcher']}")
+        for feed in self.feeds:
+            feed.setdefault('parser', 'rss')
+            feed.setdefault('interval', 300)
+            feed.setdefault('items', 3)
+            if parsers and feed['parser'] not in parsers:
+                raise ValueError(f"Parser desconhecido no feed {feed['url']}: {feed['parser']}")
+
+        self._last_run = {}
+
+    @classmethod
+    def load(cls, path, fetchers=(), parsers=()):
+        if not os.path.exists(path):
+            return cls(DEFAULT_CONFIG, fetchers, parsers)
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f), fetchers, parsers)
+
+    def coin_ids(self):
+        """Todos os ids de moedas, sem repetição, na ordem da configuração"""
+        return list(dict.fromkeys(coin for group in self.coin_groups for coin in group['ids']))
+
+    def min_interval(self, items, default):
+        return min((item['interval'] for item in items), default=default)
+
+    def due(self, items, key):
+        """Itens cujo intervalo venceu desde a última execução bem-sucedida"""
+        now = time.monotonic()
+        due = []
+        for item in items:
+            last = self._last_run.get((key, item.get('url') or item.get('name')))
+            # Tolerância de 10% para não perder o ciclo por jitter do agendador
+            if last is None or now - last >= item['interval'] * 0.9:
+                due.append(item)
+        return due
+
+    def mark_run(self, items, key):
+        """Registra a execução bem-sucedida dos itens; os que falharam continuam vencidos"""
+        now = time.monotonic()
+        for item in items:
+            self._last_run[(key, item.get('url') or item.get('name'))] = now
+
+    def reset(self):
+        """Esquece as últimas execuções: todos os itens ficam vencidos"""
+        self._last_run.clear()
+
+
+def id_batches(ids, max_length=MAX_IDS_LENGTH, max_size=MAX_PER_PAGE):
+    """Divide a lista de ids em lotes que cabem na URL e numa página do CoinGecko"""
+    batch, length = [], 0
+    for coin in ids:
+        extra = len(coin) + (1 if batch else 0)
+        if batch and (length + extra > max_length or len(batch) >= max_size):
+            yield batch
+            batch, length = [], 0
+            extra = len(coin)
+        batch.append(coin)
+        length += extra
+    if batch:
+        yield batch
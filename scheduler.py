@@ -0,0 +1,159 @@
+import asyncio
+import heapq
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SourceSchedule:
+    """Configuração e estado de agendamento de uma fonte"""
+
+    def __init__(self, key, interval, jitter=0.1, max_backoff=1800, retry_interval=30):
+        self.key = key
+        self.interval = interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.retry_interval = retry_interval
+        self.failures = 0
+        self.next_due = 0.0
+        self.running = False
+
+    def next_delay(self):
+        """Próximo intervalo com jitter; após falhas, backoff exponencial a partir de retry_interval
+
+        Enquanto a fonte falha o cache continua servindo o último valor bom,
+        então a primeira nova tentativa não espera o intervalo normal.
+        """
+        if self.failures:
+            delay = min(self.retry_interval * 2 ** (self.failures - 1), max(self.max_backoff, self.interval))
+        else:
+            delay = self.interval
+        return delay * (1 + random.uniform(-self.jitter, self.jitter))
+
+
+class RefreshScheduler:
+    """Agenda a atualização de cada fonte com intervalo próprio usando uma fila de prioridade"""
+
+    def __init__(self, executor, job):
+        # job(key) -> bool indicando sucesso
+        self.executor = executor
+        self.job = job
+        self.sources = {}
+        self._heap = []
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._wakeup = None  # (event loop, asyncio.Event) quando rodando em run_async
+
+    def add(self, key, interval, jitter=0.1, max_backoff=1800, initial_delay=0, retry_interval=30):
+        """Registra uma fonte; a primeira execução ocorre após initial_delay segundos"""
+        with self._cond:
+            source = SourceSchedule(key, interval, jitter, max_backoff, retry_interval)
+            source.next_due = time.monotonic() + initial_delay
+            self.sources[key] = source
+            heapq.heappush(self._heap, (source.next_due, key))
+            self._notify()
+
+    def trigger(self, key):
+        """Antecipa a atualização de uma fonte para agora"""
+        with self._cond:
+            source = self.sources[key]
+            source.next_due = time.monotonic()
+            heapq.heappush(self._heap, (source.next_due, key))
+            self._notify()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._notify()
+
+    def status(self):
+        """Estado atual de cada fonte (segundos até a próxima execução, falhas)"""
+        now = time.monotonic()
+        with self._cond:
+            return {
+                key: {
+                    'interval': source.interval,
+                    'next_in': round(max(source.next_due - now, 0), 1),
+                    'failures': source.failures,
+                    'running': source.running
+                }
+                for key, source in self.sources.items()
+            }
+
+    def _dispatch_due(self):
+        """Dispara as fontes vencidas; retorna segundos até o próximo prazo (None sem fontes)
+
+        Deve ser chamado com self._cond adquirido.
+        """
+        while self._heap:
+            due, key = self._heap[0]
+            source = self.sources[key]
+            if due != source.next_due:
+                # Entrada obsoleta (fonte reagendada)
+                heapq.heappop(self._heap)
+                continue
+
+            wait = due - time.monotonic()
+            if wait > 0:
+                return wait
+
+            heapq.heappop(self._heap)
+            if source.running:
+                # Execução anterior ainda em andamento: tenta de novo após um intervalo
+                source.next_due = time.monotonic() + source.interval
+                heapq.heappush(self._heap, (source.next_due, key))
+                continue
+
+            source.running = True
+            self.executor.submit(self._run, source)
+        return None
+
+    def _notify(self):
+        """Acorda o loop (thread ou event loop) após mudanças na fila; chamado com self._cond adquirido"""
+        self._cond.notify()
+        if self._wakeup is not None:
+            loop, event = self._wakeup
+            loop.call_soon_threadsafe(event.set)
+
+    def run_forever(self):
+        """Loop principal: dispara cada fonte quando vence o seu prazo"""
+        with self._cond:
+            while not self._stopped:
+                self._cond.wait(self._dispatch_due())
+
+    async def run_async(self):
+        """Mesmo loop como tarefa de um event loop asyncio (modo ASGI); as buscas seguem no executor"""
+        event = asyncio.Event()
+        with self._cond:
+            self._wakeup = (asyncio.get_running_loop(), event)
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                event.clear()
+                wait = self._dispatch_due()
+            try:
+                await asyncio.wait_for(event.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def _run(self, source):
+        try:
+            ok = self.job(source.key)
+        except Exception as e:
+            logger.error(f"Erro ao atualizar {source.key}: {e}")
+            ok = False
+
+        with self._cond:
+            source.running = False
+            source.failures = 0 if ok else source.failures + 1
+            source.next_due = time.monotonic() + source.next_delay()
+            heapq.heappush(self._heap, (source.next_due, source.key))
+            self._notify()
+
+        if not ok:
+            logger.warning(f"Falha ao atualizar {source.key} ({source.failures}x); próxima tentativa em "
+                           f"{source.next_due - time.monotonic():.0f}s")
@@ -0,0 +1,96 @@
+import json
+import logging
+import os
+import tempfile
+
+from tickers import to_jsonable
+
+try:
+    import fcntl
+except ImportError:  # Windows: um único processo, sem eleição
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class UpdaterElection:
+    """Elege um único processo atualizador via lock exclusivo de arquivo
+
+    O lock é liberado pelo sistema operacional quando o processo termina, e
+    outro worker pode assumir chamando try_acquire() novamente.
+    """
+
+    def __init__(self, lock_path):
+        self.lock_path = lock_path
+        self._fd = None
+
+    @property
+    def is_leader(self):
+        return self._fd is not None
+
+    def try_acquire(self):
+        if self._fd is not None:
+            return True
+        if fcntl is None:
+            self._fd = -1
+            return True
+
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+
+class FileSnapshotStore:
+    """Geração do cache compartilhada entre processos através de um arquivo
+
+    O atualizador grava com rename atômico; os leitores só relêem o arquivo
+    quando o stat indica uma nova versão.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._signature = None
+
+    def write(self, generation):
+        payload = {
+            'version': generation.version,
+            'updated_at': dict(generation.updated_at),
+            'data': dict(generation.data)
+        }
+        directory = os.path.dirname(self.path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(json.dumps(payload, separators=(',', ':'), ensure_ascii=False, default=to_jsonable).encode('utf-8'))
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def read_if_changed(self):
+        """Retorna (versão, dados, updated_at) se o arquivo mudou desde a última leitura"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+
+        signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if signature == self._signature:
+            return None
+
+        try:
+            with open(self.path, 'rb') as f:
+                payload = json.loads(f.read())
+        except (OSError, ValueError) as e:
+            logger.error(f"Erro ao ler snapshot compartilhado {self.path}: {e}")
+            return None
+
+        self._signature = signature
+        return payload['version'], payload['data'], payload['updated_at']
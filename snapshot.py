@@ -0,0 +1,111 @@
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from tickers import to_jsonable
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack é opcional
+    msgpack = None
+
+BROTLI_QUALITY = 5  # Qualidade 11 (padrão) é lenta demais para rodar a cada geração e no caminho da requisição
+MAX_VARIANTS = 64  # Variantes (projeções/formatos) guardadas por snapshot, as menos usadas saem primeiro
+
+
+def encode_json(data):
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=to_jsonable).encode('utf-8')
+
+
+def encode_msgpack(data):
+    return msgpack.packb(data, default=to_jsonable)
+
+
+# Formatos de saída: nome -> (codificador, mimetype)
+FORMATS = {'json': (encode_json, 'application/json')}
+if msgpack:
+    FORMATS['msgpack'] = (encode_msgpack, 'application/msgpack')
+
+
+class EncodedPayload:
+    """Corpo já codificado (JSON ou MessagePack) e comprimido, com ETag forte"""
+
+    __slots__ = ('data', 'body', 'gzip', 'brotli', 'etag', 'last_modified', 'mimetype')
+
+    def __init__(self, data, last_modified, fmt='json', body=None):
+        encode, self.mimetype = FORMATS[fmt]
+        self.data = data
+        self.body = encode(data) if body is None else body
+        self.gzip = gzip.compress(self.body, compresslevel=6)
+        self.brotli = brotli.compress(self.body, quality=BROTLI_QUALITY) if brotli else None
+        self.etag = hashlib.sha1(self.body).hexdigest()[:20]
+        self.last_modified = last_modified
+
+    def variant(self, accept_encodings):
+        """Escolhe a melhor codificação aceita pelo cliente: (corpo, encoding, etag)"""
+        if self.brotli is not None and accept_encodings['br']:
+            return self.brotli, 'br', self.etag + '-br'
+        if accept_encodings['gzip']:
+            return self.gzip, 'gzip', self.etag + '-gz'
+        return self.body, None, self.etag
+
+
+class Snapshot:
+    """Conjunto imutável de respostas da API gerado uma vez por atualização do cache"""
+
+    def __init__(self, payloads, version):
+        self.payloads = payloads
+        self.version = version
+        self._variants = OrderedDict()
+        self._derived = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, cache, key, build):
+        """LRU de até MAX_VARIANTS itens; build() roda fora do lock"""
+        with self._lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+                return value
+        value = build()
+        with self._lock:
+            cache[key] = value
+            if len(cache) > MAX_VARIANTS:
+                cache.popitem(last=False)
+        return value
+
+    def variant(self, key, build, fmt='json'):
+        """Variante derivada (projeção/formato) codificada uma única vez por snapshot"""
+        base = self.payloads[key[0]]
+        return self._cached(self._variants, key, lambda: EncodedPayload(build(base.data), base.last_modified, fmt))
+
+    def derived(self, key, build):
+        """Dado derivado das views (ex.: tickers em outra moeda) calculado uma única vez por snapshot"""
+        return self._cached(self._derived, key, build)
+
+    @classmethod
+    def build(cls, views, version, previous=None):
+        """Codifica cada view; reaproveita as que não mudaram desde o snapshot anterior"""
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        payloads = {}
+        encoded = {}  # nome -> objeto da view cujo corpo já está em payloads
+        for name, data in views.items():
+            old = previous.payloads.get(name) if previous else None
+            if old is not None and (old.data is data or old.data == data):
+                payloads[name] = old
+            elif isinstance(data, dict) and data and all(encoded.get(key) is value for key, value in data.items()):
+                # Views compostas (dashboard) juntam os corpos já codificados de cada seção
+                body = b'{' + b','.join(encode_json(key) + b':' + payloads[key].body for key in data) + b'}'
+                payloads[name] = EncodedPayload(data, now, body=body)
+            else:
+                payloads[name] = EncodedPayload(data, now)
+            encoded[name] = data
+        return cls(payloads, version)
@@ -0,0 +1,33 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Dados em diretório temporário e sem atualizador em background (nada de chamadas às APIs externas)
+os.environ.setdefault('CRYPTO_DASHBOARD_DATA_DIR', tempfile.mkdtemp(prefix='crypto-tests-'))
+os.environ['CRYPTO_DASHBOARD_ASGI'] = '1'
+
+import app as dashboard  # noqa: E402
+from tickers import load_tickers  # noqa: E402
+
+TICKERS = [
+    {'id': 'bitcoin', 'symbol': 'btc', 'name': 'Bitcoin', 'current_price': 60000.0, 'market_cap': 1.2e12,
+     'price_change_percentage_24h': 1.5},
+    {'id': 'ethereum', 'symbol': 'eth', 'name': 'Ethereum', 'current_price': 3000.0, 'market_cap': 3.6e11,
+     'price_change_percentage_24h': -0.5}
+]
+
+
+@pytest.fixture
+def client():
+    """Cliente Flask com uma nova geração do cache (tickers e câmbio) publicada"""
+    dashboard.cache.update(lambda current: {
+        'coingecko_data': load_tickers(TICKERS),
+        'exchange_rates': {'USD_BRL': 5.0}
+    })
+    dashboard.publish_snapshot()
+    return dashboard.app.test_client()
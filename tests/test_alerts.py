@@ -0,0 +1,105 @@
+import os
+import threading
+
+import pytest
+
+import app as dashboard
+from alerts import AlertEngine
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Dois motores sobre os mesmos logs, como dois workers do gunicorn"""
+    def engine():
+        return AlertEngine(rules_path=str(tmp_path / 'rules.jsonl'), events_path=str(tmp_path / 'events.jsonl'))
+    return engine(), engine()
+
+
+def rule(threshold, direction='above'):
+    return {'metric': 'price', 'coin': 'bitcoin', 'direction': direction, 'threshold': threshold}
+
+
+def test_rules_are_shared_between_workers(workers):
+    leader, follower = workers
+    first = leader.add(rule(100))
+    second = follower.add(rule(200))
+    third = leader.add(rule(300))
+    assert [first.id, second.id, third.id] == [1, 2, 3]
+
+    assert follower.get(first.id).threshold == 100
+    assert follower.remove(third.id)
+    assert leader.get(third.id) is None
+    assert leader.status()['rules'] == 2
+
+
+def test_events_fired_by_leader_reach_followers(workers):
+    leader, follower = workers
+    follower.add(rule(100))
+    leader.evaluate({('price', 'bitcoin'): 90.0}, version=1)
+
+    woke = threading.Event()
+    waiter = threading.Thread(target=lambda: (follower.wait(0, 5), woke.set()))
+    waiter.start()
+    events = leader.evaluate({('price', 'bitcoin'): 110.0}, version=2)
+    assert [event['rule_id'] for event in events] == [1]
+
+    follower.sync()
+    waiter.join(5)
+    assert woke.is_set()
+    assert follower.events_since(0) == events
+    assert follower.last_event_id == leader.last_event_id == events[-1]['id']
+
+
+def test_older_generation_is_not_evaluated(workers):
+    leader, _ = workers
+    leader.add(rule(100, direction='below'))
+    leader.evaluate({('price', 'bitcoin'): 110.0}, version=1)
+    leader.evaluate({('price', 'bitcoin'): 120.0}, version=3)
+    # Geração 2 publicada depois da 3: o preço antigo não pode disparar um cruzamento falso
+    assert leader.evaluate({('price', 'bitcoin'): 90.0}, version=2) == []
+    assert leader.events_since(0) == []
+
+
+def test_compaction_keeps_workers_consistent(workers, tmp_path):
+    leader, follower = workers
+    kept = leader.add(rule(1))
+    for _ in range(700):
+        follower.remove(leader.add(rule(2)).id)
+    lines = (tmp_path / 'rules.jsonl').read_bytes().count(b'\n')
+    assert lines < 1400
+    leader.sync()
+    follower.sync()
+    assert set(follower.rules) == set(leader.rules) == {kept.id}
+    # Um worker novo lê o log compactado sem reutilizar ids de regras removidas
+    fresh = AlertEngine(rules_path=str(tmp_path / 'rules.jsonl'))
+    assert fresh.add(rule(3)).id == 702
+    assert follower.add(rule(4)).id == 703
+    assert os.path.exists(tmp_path / 'rules.jsonl.lock')
+
+
+@pytest.mark.parametrize('threshold', [float('nan'), float('inf'), 'nan', '-Infinity'])
+def test_non_finite_threshold_is_rejected(workers, threshold):
+    leader, _ = workers
+    with pytest.raises(ValueError):
+        leader.add(rule(threshold))
+    assert leader.status()['rules'] == 0
+
+
+def test_non_finite_threshold_returns_400(client):
+    response = client.post('/api/alerts', data='{"metric": "price", "coin": "bitcoin", '
+                           '"direction": "above", "threshold": NaN}', content_type='application/json')
+    assert response.status_code == 400
+
+
+def test_long_poll_needs_sse_under_wsgi(client, monkeypatch):
+    monkeypatch.setattr(dashboard, 'SSE_ENABLED', False)
+    waited = []
+    monkeypatch.setattr(dashboard.alert_engine, 'wait', lambda since, timeout: waited.append(timeout))
+    response = client.get(f'/api/alerts/events?since={dashboard.alert_engine.last_event_id}&wait=30')
+    assert response.status_code == 200
+    assert response.get_json()['events'] == []
+    assert waited == []
+
+    monkeypatch.setattr(dashboard, 'SSE_ENABLED', True)
+    client.get(f'/api/alerts/events?since={dashboard.alert_engine.last_event_id}&wait=30')
+    assert waited == [30]
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+import requests
+
+import app as dashboard
+from defi import DefiIndex, compact_protocol, iter_json_array
+
+PROTOCOLS = [
+    {'name': 'Lido', 'tvl': 3.1e10, 'chains': ['Ethereum'], 'category': 'Liquid Staking'},
+    {'name': 'Aave', 'tvl': 1.25e10, 'chains': ['Ethereum', 'Polygon'], 'chainTvls': {'Polygon': 4e8}},
+    {'name': 'Ção "DEX"', 'tvl': -0.5e-3, 'chain': 'Solana', 'extra': [1, {'a': None}], 'ok': True}
+]
+
+
+def split(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, 10 ** 6])
+def test_elements_survive_any_chunk_boundary(size):
+    # Cortes no meio de números, strings escapadas e caracteres UTF-8 de vários bytes
+    data = json.dumps(PROTOCOLS, ensure_ascii=False, indent=1).encode('utf-8')
+    assert list(iter_json_array(split(data, size))) == PROTOCOLS
+
+
+@pytest.mark.parametrize('size', [1, 3])
+def test_scalars_and_empty_arrays(size):
+    assert list(iter_json_array(split(b' [ 12 , 3.5e2,"x" ,null ] ', size))) == [12, 350.0, 'x', None]
+    assert list(iter_json_array(split(b'[]', size))) == []
+
+
+@pytest.mark.parametrize('data', [b'{"a": 1}', b'[1, 2', b'[1 2]', b'[{"a": 1}'])
+def test_invalid_documents_raise(data):
+    with pytest.raises(ValueError):
+        list(iter_json_array(split(data, 2)))
+
+
+class StreamedResponse(requests.Response):
+    def __init__(self, body):
+        super().__init__()
+        self.status_code = 200
+        self._body = body
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        return iter(split(self._body, chunk_size))
+
+    def close(self):
+        pass
+
+
+def test_empty_upstream_list_keeps_published_index(monkeypatch, tmp_path):
+    monkeypatch.setattr(dashboard, 'defi_index', DefiIndex(str(tmp_path / 'defi_index.json')))
+    body = json.dumps(PROTOCOLS).encode('utf-8')
+    monkeypatch.setattr(dashboard.aggregator, 'get', lambda url, **kwargs: StreamedResponse(body))
+    assert [item['name'] for item in dashboard.aggregator.get_defi_protocols()] == ['Lido', 'Aave', 'Ção "DEX"']
+
+    body = b'[]'
+    assert dashboard.aggregator.get_defi_protocols() == []
+    assert dashboard.defi_index.query(chain='polygon') == [{**compact_protocol(PROTOCOLS[1]),
+                                                            'chain_tvl': 4e8}]
@@ -0,0 +1,25 @@
+import threading
+
+import app as dashboard
+
+
+def test_follower_survives_sync_errors(monkeypatch):
+    calls = []
+    took_over = threading.Event()
+
+    def sync():
+        calls.append(len(calls))
+        if len(calls) < 3:
+            raise OSError('snapshot.json truncado')
+
+    monkeypatch.setattr(dashboard, 'SHARED_POLL_INTERVAL', 0)
+    monkeypatch.setattr(dashboard, 'sync_shared_cache', sync)
+    monkeypatch.setattr(dashboard.election, 'try_acquire', lambda: len(calls) >= 4)
+    monkeypatch.setattr(dashboard, 'start_updater', took_over.set)
+
+    follower = threading.Thread(target=dashboard.follower_loop, daemon=True)
+    follower.start()
+    follower.join(5)
+    # Continuou sincronizando depois das falhas e assumiu quando o lock ficou livre
+    assert took_over.is_set()
+    assert len(calls) == 4
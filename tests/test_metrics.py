@@ -0,0 +1,26 @@
+import threading
+
+from metrics import PRUNE_EVERY, MetricsRegistry
+
+
+def test_dead_thread_shards_are_merged_without_scrape():
+    registry = MetricsRegistry()
+    requests = registry.counter('test_requests_total', 'Requisições', ('route',))
+
+    # Como o servidor do Flask: uma thread nova por requisição, sem ninguém lendo /metrics
+    for _ in range(5000):
+        thread = threading.Thread(target=requests.inc, args=('/',))
+        thread.start()
+        thread.join()
+
+    assert len(registry._shards) + len(registry._pending) <= PRUNE_EVERY
+    assert 'test_requests_total{route="/"} 5000' in registry.render()
+
+
+def test_live_thread_shard_keeps_counting():
+    registry = MetricsRegistry()
+    requests = registry.counter('test_requests_total', 'Requisições')
+    requests.inc()
+    registry.collect()
+    requests.inc(amount=2)
+    assert 'test_requests_total 3' in registry.render()
@@ -0,0 +1,38 @@
+from news_index import NewsIndex
+
+# Lote como o get_crypto_news entrega: da mais recente para a mais antiga
+BATCH = [
+    {'title': 'Bitcoin passa de 70 mil', 'link': 'https://a.example/3', 'published': 'Tue, 15 Oct 2024 21:03:00 GMT'},
+    {'title': 'Ethereum sobe com ETF', 'link': 'https://b.example/2', 'published': '2024-10-15T20:33:00+00:00'},
+    {'title': 'Bitcoin recua na abertura', 'link': 'https://a.example/1', 'published': 'Tue, 15 Oct 2024 12:00:00 GMT'}
+]
+ALIASES = {'bitcoin': 'bitcoin', 'btc': 'bitcoin', 'ethereum': 'ethereum'}
+
+
+def links(result):
+    return [item['link'] for item in result['items']]
+
+
+def test_batch_is_returned_newest_first(tmp_path):
+    index = NewsIndex(str(tmp_path / 'news.jsonl'))
+    assert index.add_many(BATCH, ALIASES) == 3
+    assert links(index.search(limit=3)) == [item['link'] for item in BATCH]
+    assert links(index.search(coin='bitcoin')) == ['https://a.example/3', 'https://a.example/1']
+
+
+def test_order_survives_reload_and_pagination(tmp_path):
+    path = str(tmp_path / 'news.jsonl')
+    NewsIndex(path).add_many(BATCH, ALIASES)
+    index = NewsIndex(path)
+    index.load()
+    first = index.search(limit=2)
+    assert links(first) == ['https://a.example/3', 'https://b.example/2']
+    assert links(index.search(cursor=first['next_cursor'], limit=2)) == ['https://a.example/1']
+
+
+def test_duplicates_are_ignored(tmp_path):
+    index = NewsIndex(str(tmp_path / 'news.jsonl'))
+    index.add_many(BATCH, ALIASES)
+    again = [{**BATCH[0], 'link': 'https://www.a.example/3/?utm_source=feed'}]
+    assert index.add_many(again, ALIASES) == 0
+    assert len(index) == 3
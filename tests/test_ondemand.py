@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+
+from ondemand import CoinBatcher, TTLCache
+
+
+class Upstream:
+    """fetch_batch falso: registra os lotes e segura a resposta até release()"""
+
+    def __init__(self, known=('bitcoin', 'ethereum', 'solana')):
+        self.known = known
+        self.batches = []
+        self.released = threading.Event()
+        self.error = None
+
+    def __call__(self, ids):
+        self.batches.append(sorted(ids))
+        self.released.wait(5)
+        if self.error:
+            raise self.error
+        return [{'id': coin_id} for coin_id in ids if coin_id in self.known]
+
+
+def request_all(batcher, ids):
+    results = {}
+    threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, batcher.get(ids[i]))) for i in range(len(ids))]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_concurrent_requests_share_one_flight_and_one_batch():
+    upstream = Upstream()
+    batcher = CoinBatcher(upstream, window=0.05)
+    ids = ['bitcoin'] * 5 + ['ethereum'] * 3 + ['moeda-nova']
+    threads, results = request_all(batcher, ids)
+    time.sleep(0.1)
+    upstream.released.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert upstream.batches == [['bitcoin', 'ethereum', 'moeda-nova']]
+    assert batcher.upstream_calls == 1
+    assert [results[i] for i in range(len(ids))] == [{'id': 'bitcoin'}] * 5 + [{'id': 'ethereum'}] * 3 + [None]
+    # Resultados (inclusive a moeda desconhecida) ficam em cache
+    assert batcher.get('bitcoin') == {'id': 'bitcoin'}
+    assert batcher.get('moeda-nova') is None
+    assert batcher.upstream_calls == 1
+
+
+def test_full_batch_is_flushed_without_waiting_for_window():
+    upstream = Upstream(known=())
+    upstream.released.set()
+    batcher = CoinBatcher(upstream, window=60, max_batch=2)
+    threads, _ = request_all(batcher, ['a', 'b'])
+    for thread in threads:
+        thread.join(5)
+    assert not any(thread.is_alive() for thread in threads)
+    assert upstream.batches == [['a', 'b']]
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    upstream = Upstream()
+    upstream.error = RuntimeError('429')
+    upstream.released.set()
+    batcher = CoinBatcher(upstream, window=0.01)
+    with pytest.raises(RuntimeError):
+        batcher.get('bitcoin')
+    upstream.error = None
+    assert batcher.get('bitcoin') == {'id': 'bitcoin'}
+    assert batcher.upstream_calls == 2
+
+
+def test_ttl_cache_expires_and_evicts_least_recently_used(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=100)
+    assert cache.get('a') == (True, 1)
+    cache.set('c', 3)  # 'b' é o menos usado
+    assert cache.get('b') == (False, None)
+    now[0] = 11
+    assert cache.get('a') == (False, None)
+    assert cache.get('c') == (False, None)
+    assert len(cache) == 0
@@ -0,0 +1,53 @@
+import pytest
+import requests
+
+import app as dashboard
+from upstream import SharedUpstreamGovernor, UpstreamGovernor, UpstreamUnavailable
+
+HOST = 'api.coingecko.com'
+
+
+def rate_limited(url, **kwargs):
+    response = requests.Response()
+    response.status_code = 429
+    response.url = url
+    response._content = b'{}'
+    return response
+
+
+@pytest.fixture
+def governors(monkeypatch):
+    monkeypatch.setattr(dashboard, 'governor', UpstreamGovernor(dashboard.UPSTREAM_LIMITS))
+    monkeypatch.setattr(dashboard, 'ondemand_governor',
+                        UpstreamGovernor(dashboard.ONDEMAND_LIMITS, default_limit=(0.1, 1), max_wait=0))
+    monkeypatch.setattr(dashboard.aggregator.transport, 'get', rate_limited)
+    return dashboard.governor, dashboard.ondemand_governor
+
+
+def test_ondemand_spray_does_not_touch_refresher_budget(governors):
+    refresher, ondemand = governors
+    for i in range(20):
+        with pytest.raises(Exception):
+            dashboard.coin_batcher.get(f'moeda-inexistente-{i}')
+
+    assert ondemand.status()[HOST]['state'] == 'open'
+    # O atualizador não gastou nenhum token nem registrou falhas
+    assert HOST not in refresher.status()
+    assert not refresher.is_open(HOST)
+
+
+def test_workers_share_one_ondemand_budget(tmp_path):
+    """Dois workers sobre o mesmo arquivo gastam um único orçamento e veem o mesmo circuito"""
+    path = str(tmp_path / 'ondemand_budget.json')
+    first, second = (SharedUpstreamGovernor(path, dashboard.ONDEMAND_LIMITS, default_limit=(0.1, 1), max_wait=0)
+                     for _ in range(2))
+    url = f'https://{HOST}/api/v3/coins/markets'
+
+    assert first.acquire(url) == HOST
+    with pytest.raises(UpstreamUnavailable):
+        second.acquire(url)
+    assert second.status()[HOST]['tokens'] < 1
+
+    for _ in range(3):
+        second.record(HOST, error=OSError('timeout'))
+    assert first.is_open(HOST)
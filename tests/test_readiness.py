@@ -0,0 +1,32 @@
+import requests
+
+import app as dashboard
+
+
+def fail_upstream(*args, **kwargs):
+    raise requests.ConnectionError('upstream fora do ar')
+
+
+def test_not_ready_when_every_source_fails(monkeypatch):
+    monkeypatch.setattr(dashboard.aggregator, 'get', fail_upstream)
+    dashboard.registry.reset()
+    dashboard.cache.publish({'last_update': {'stale': True}})
+    dashboard.update_cache()
+
+    status = dashboard.cache.get('section_status')
+    assert not any(status[key]['ok'] for key in dashboard.DATA_SOURCES)
+    response = dashboard.app.test_client().get('/api/ready')
+    assert response.status_code == 503
+    assert response.get_json()['ready'] is False
+
+
+def test_ready_once_a_source_succeeds(monkeypatch):
+    monkeypatch.setattr(dashboard.aggregator, 'get', fail_upstream)
+    monkeypatch.setattr(dashboard.aggregator, 'get_global_crypto_stats', lambda: {'total_market_cap': 1.0})
+    dashboard.registry.reset()
+    dashboard.cache.publish({'last_update': {'stale': True}})
+    dashboard.update_cache()
+
+    response = dashboard.app.test_client().get('/api/ready')
+    assert response.status_code == 200
+    assert response.get_json()['ready'] is True
@@ -0,0 +1,54 @@
+import pytest
+import requests
+
+import app as dashboard
+from conftest import TICKERS
+from tickers import load_tickers
+
+
+@pytest.fixture
+def markets(monkeypatch):
+    """Substitui a página /coins/markets; calls conta as chamadas ao upstream"""
+    state = {'calls': 0, 'fail': False}
+
+    def fetch_markets_page(ids, with_history=True):
+        state['calls'] += 1
+        if state['fail']:
+            raise requests.ConnectionError('upstream fora do ar')
+        return load_tickers([ticker for ticker in TICKERS if ticker['id'] in ids])
+
+    monkeypatch.setattr(dashboard.aggregator, 'fetch_markets_page', fetch_markets_page)
+    monkeypatch.setattr(dashboard.registry, 'coin_groups', [
+        {'name': 'teste', 'fetcher': 'coingecko_markets', 'interval': 60, 'ids': ['bitcoin', 'ethereum']}
+    ])
+    dashboard.registry.reset()
+    return state
+
+
+def test_retry_after_failure_fetches_upstream(markets):
+    assert dashboard.refresh_source('coingecko_data')
+    assert markets['calls'] == 1
+
+    markets['fail'] = True
+    dashboard.registry.reset()  # Intervalo do grupo venceu
+    assert not dashboard.refresh_source('coingecko_data')
+    assert markets['calls'] == 2
+
+    # A nova tentativa do agendador (antes do intervalo do grupo) tem de ir ao upstream
+    assert not dashboard.refresh_source('coingecko_data')
+    assert markets['calls'] == 3
+    assert dashboard.section_freshness('coingecko_data')[1]
+
+    markets['fail'] = False
+    assert dashboard.refresh_source('coingecko_data')
+    assert markets['calls'] == 4
+    assert not dashboard.section_freshness('coingecko_data')[1]
+
+
+def test_nothing_due_keeps_section_untouched(markets):
+    assert dashboard.refresh_source('coingecko_data')
+    updated_at = dashboard.cache.current.updated_at['coingecko_data']
+
+    assert dashboard.refresh_source('coingecko_data')
+    assert markets['calls'] == 1
+    assert dashboard.cache.current.updated_at['coingecko_data'] == updated_at
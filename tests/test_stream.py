@@ -0,0 +1,19 @@
+import app as dashboard
+
+
+def test_stream_disabled_under_wsgi_by_default(client, monkeypatch):
+    monkeypatch.setattr(dashboard, 'SSE_ENABLED', False)
+    response = client.get('/api/stream')
+    assert response.status_code == 503
+    assert 'CRYPTO_DASHBOARD_SSE' in response.get_json()['error']
+
+
+def test_stream_enabled_by_flag(client, monkeypatch):
+    monkeypatch.setattr(dashboard, 'SSE_ENABLED', True)
+    response = client.get('/api/stream', buffered=False)
+    try:
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        assert next(iter(response.response)) == b'retry: 5000\n\n'
+    finally:
+        response.close()
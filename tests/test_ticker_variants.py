@@ -0,0 +1,61 @@
+import msgpack
+import pytest
+
+import app as dashboard
+import snapshot as snapshot_module
+
+
+@pytest.mark.parametrize('first, second', [
+    ('/api/tickers?fields=id,current_price', '/api/tickers?fields=id,current_price&format=msgpack'),
+    ('/api/tickers?fields=id&format=msgpack', '/api/tickers?fields=id')
+])
+def test_format_is_part_of_variant_key(client, first, second):
+    client.get(first)
+    for path in (first, second):
+        response = client.get(path)
+        assert response.status_code == 200
+        if 'format=msgpack' in path:
+            assert response.mimetype == 'application/msgpack'
+            assert msgpack.unpackb(response.data)[0]['id'] == 'bitcoin'
+        else:
+            assert response.mimetype == 'application/json'
+            assert response.get_json()[0]['id'] == 'bitcoin'
+
+
+def test_currency_variant_is_converted(client):
+    usd = client.get('/api/tickers?fields=id,current_price').get_json()
+    brl = client.get('/api/tickers?fields=id,current_price&currency=brl').get_json()
+    assert brl[0]['current_price'] == usd[0]['current_price'] * 5.0
+
+
+@pytest.mark.parametrize('path', [
+    '/api/tickers?format=xml',
+    '/api/tickers?currency=xyz',
+    '/api/dashboard-data?format=xml',
+    '/api/dashboard-data?currency=xyz'
+])
+def test_invalid_parameters_are_bad_requests(client, path):
+    response = client.get(path)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_equivalent_parameters_share_one_variant(client):
+    snapshot = dashboard.current_snapshot
+    for path in ('/api/tickers?fields=id,current_price', '/api/tickers?fields=current_price,id,id',
+                 '/api/tickers?fields=id,current_price&limit=2', '/api/tickers?fields=id,current_price&limit=500'):
+        assert client.get(path).get_json() == [{'current_price': 60000.0, 'id': 'bitcoin'},
+                                               {'current_price': 3000.0, 'id': 'ethereum'}]
+    assert len(snapshot._variants) == 1
+
+
+def test_variant_cache_evicts_least_recently_used(client, monkeypatch):
+    monkeypatch.setattr(snapshot_module, 'MAX_VARIANTS', 3)
+    snapshot = dashboard.current_snapshot
+    client.get('/api/tickers?currency=brl')
+    for fields in ('id', 'name', 'symbol'):
+        client.get(f'/api/tickers?fields={fields}')
+        client.get('/api/tickers?currency=brl')
+    assert len(snapshot._variants) == 3
+    assert ('coingecko_data', (), None, False, 'brl', 'json') in snapshot._variants
+    assert ('coingecko_data', ('id',), None, False, 'usd', 'json') not in snapshot._variants
@@ -0,0 +1,51 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from transport import HTTPTransport
+
+
+@pytest.fixture
+def upstream():
+    """Servidor local que responde sempre com o status e o Retry-After configurados"""
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            self.send_response(server.status)
+            self.send_header('Retry-After', '4')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.status = 503
+    server.hits = hits
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_retry_after_is_left_to_the_governor(upstream, status):
+    upstream.status = status
+    transport = HTTPTransport()
+    start = time.monotonic()
+    response = transport.get(f'http://127.0.0.1:{upstream.server_port}/coins', timeout=1)
+    assert response.status_code == status
+    assert response.headers['Retry-After'] == '4'
+    assert time.monotonic() - start < 1
+    assert len(upstream.hits) == 1
+
+
+def test_gateway_errors_are_retried(upstream):
+    upstream.status = 502
+    response = HTTPTransport(retries=2).get(f'http://127.0.0.1:{upstream.server_port}/coins', timeout=1)
+    assert response.status_code == 502
+    assert len(upstream.hits) == 3
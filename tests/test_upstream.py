@@ -0,0 +1,115 @@
+import pytest
+import requests
+
+from upstream import CircuitBreaker, TokenBucket, UpstreamGovernor, UpstreamUnavailable, parse_retry_after
+
+HOST = 'api.example.com'
+URL = f'https://{HOST}/v1/data'
+
+
+def response(status, retry_after=None):
+    result = requests.Response()
+    result.status_code = status
+    if retry_after is not None:
+        result.headers['Retry-After'] = retry_after
+    return result
+
+
+@pytest.fixture
+def clock():
+    return [1000.0]
+
+
+@pytest.fixture
+def governor(clock):
+    governor = UpstreamGovernor({HOST: (1, 2)}, max_wait=0)
+    governor.clock = lambda: clock[0]
+    return governor
+
+
+def test_breaker_opens_after_threshold_and_backs_off_exponentially():
+    breaker = CircuitBreaker(threshold=3, base_backoff=30, max_backoff=100)
+    for _ in range(2):
+        breaker.failure(0)
+    assert breaker.state(0) == 'closed'
+    breaker.failure(0)
+    assert breaker.state(29) == 'open'
+    assert breaker.state(30) == 'half-open'
+
+    assert breaker.allow(30)
+    breaker.failure(30)  # Teste falhou: reabre com o dobro do prazo
+    assert breaker.open_until == 90
+    breaker.failure(90)
+    breaker.failure(90)
+    assert breaker.open_until == 190  # Limitado a max_backoff
+
+
+def test_half_open_lets_a_single_trial_through():
+    breaker = CircuitBreaker(threshold=1, base_backoff=10)
+    breaker.failure(0)
+    assert not breaker.allow(5)
+    assert breaker.allow(10)
+    assert not breaker.allow(10)  # Só uma requisição de teste em voo
+    breaker.success()
+    assert breaker.state(10) == 'closed'
+    assert breaker.allow(10) and breaker.allow(10)
+
+
+def test_retry_after_opens_the_circuit_on_first_429(governor, clock):
+    host = governor.acquire(URL)
+    governor.record(host, response(429, '120'))
+    assert governor.is_open(HOST)
+    clock[0] += 119
+    with pytest.raises(UpstreamUnavailable):
+        governor.acquire(URL)
+    clock[0] += 1
+    assert governor.status()[HOST]['state'] == 'half-open'
+    assert governor.acquire(URL) == HOST
+    governor.record(HOST, response(200))
+    assert governor.status()[HOST]['state'] == 'closed'
+
+
+def test_failed_trial_reopens_circuit(governor, clock):
+    for _ in range(3):
+        governor.record(HOST, error=requests.ConnectionError())
+    assert governor.is_open(HOST)
+    clock[0] += 30
+    governor.acquire(URL)
+    with pytest.raises(UpstreamUnavailable, match='Circuito'):
+        governor.acquire(URL)  # Outra thread durante o teste
+    governor.record(HOST, response(503))
+    assert governor.is_open(HOST)
+    assert governor.status()[HOST]['failures'] == 4
+
+
+def test_budget_exhaustion_refunds_token_and_releases_trial(governor, clock):
+    governor.acquire(URL)
+    governor.acquire(URL)
+    with pytest.raises(UpstreamUnavailable, match='Rate limit'):
+        governor.acquire(URL)
+    assert governor.status()[HOST]['tokens'] == 0  # O token recusado foi devolvido
+
+    # No meio-aberto, a recusa por orçamento não pode prender o teste do circuito
+    breaker = governor._breakers[HOST]
+    breaker.failures, breaker.open_until = 3, clock[0]
+    with pytest.raises(UpstreamUnavailable, match='Rate limit'):
+        governor.acquire(URL)
+    assert not breaker.trial_in_flight
+    clock[0] += 1
+    assert governor.acquire(URL) == HOST
+
+
+def test_token_bucket_refills_up_to_capacity():
+    bucket = TokenBucket(rate=2, capacity=2)
+    bucket.updated = 0
+    assert bucket.reserve(0) == 0
+    assert bucket.reserve(0) == 0
+    assert bucket.reserve(0) == 0.5
+    bucket.refund()
+    assert bucket.reserve(10) == 0
+    assert bucket.tokens == 1
+
+
+@pytest.mark.parametrize('value, expected', [('30', 30.0), ('-5', 0.0), ('', None), ('soon', None)])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
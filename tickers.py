@@ -0,0 +1,101 @@
+import math
+import sys
+from array import array
+from operator import attrgetter
+
+# Campos de /coins/markets do CoinGecko guardados no modelo (na ordem da resposta)
+FIELDS = (
+    'id', 'symbol', 'name', 'image', 'current_price', 'market_cap', 'market_cap_rank',
+    'fully_diluted_valuation', 'total_volume', 'high_24h', 'low_24h', 'price_change_24h',
+    'price_change_percentage_24h', 'market_cap_change_24h', 'market_cap_change_percentage_24h',
+    'circulating_supply', 'total_supply', 'max_supply', 'ath', 'ath_change_percentage', 'ath_date',
+    'atl', 'atl_change_percentage', 'atl_date', 'roi', 'last_updated',
+    'price_change_percentage_1h_in_currency', 'price_change_percentage_24h_in_currency',
+    'price_change_percentage_7d_in_currency', 'price_change_percentage_30d_in_currency'
+)
+SPARKLINE_FIELD = 'sparkline_in_7d'
+INTERNED = ('id', 'symbol', 'name', 'image')
+get_fields = attrgetter(*FIELDS)
+
+
+class Ticker:
+    """Ticker de uma moeda, montado uma vez na ingestão e nunca alterado depois
+
+    Usa __slots__ no lugar do dict do CoinGecko e guarda o sparkline como
+    array('d'). Expõe get(), [] e iteração para o código que lê tickers
+    como dicts; to_dict() só é chamado na serialização.
+    """
+
+    __slots__ = FIELDS + ('sparkline',)
+
+    def __init__(self, **values):
+        for field in FIELDS:
+            setattr(self, field, values.get(field))
+        self.sparkline = values.get('sparkline')
+
+    @classmethod
+    def from_dict(cls, data):
+        """Converte um item da resposta do CoinGecko (campos desconhecidos são descartados)"""
+        if isinstance(data, cls):
+            return data
+        values = {field: data.get(field) for field in FIELDS}
+        for field in INTERNED:
+            if isinstance(values[field], str):
+                values[field] = sys.intern(values[field])
+        prices = (data.get(SPARKLINE_FIELD) or {}).get('price')
+        if prices:
+            values['sparkline'] = array('d', (float('nan') if p is None else p for p in prices))
+        return cls(**values)
+
+    def to_dict(self):
+        data = dict(zip(FIELDS, get_fields(self)))
+        if self.sparkline is not None:
+            data[SPARKLINE_FIELD] = self[SPARKLINE_FIELD]
+        return data
+
+    def __iter__(self):
+        yield from FIELDS
+        if self.sparkline is not None:
+            yield SPARKLINE_FIELD
+
+    def __contains__(self, key):
+        return key in FIELDS or (key == SPARKLINE_FIELD and self.sparkline is not None)
+
+    def __getitem__(self, key):
+        if key in FIELDS:
+            return getattr(self, key)
+        if key == SPARKLINE_FIELD and self.sparkline is not None:
+            prices = self.sparkline.tolist()
+            # NaN marca pontos ausentes no array
+            if math.isnan(sum(self.sparkline)):
+                prices = [None if math.isnan(p) else p for p in prices]
+            return {'price': prices}
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other):
+        if not isinstance(other, Ticker):
+            return NotImplemented
+        return self is other or (get_fields(self) == get_fields(other) and self.sparkline == other.sparkline)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'Ticker({self.id!r}, current_price={self.current_price!r})'
+
+
+def load_tickers(items):
+    """Lista de dicts (resposta do upstream, disco ou snapshot compartilhado) -> Tickers"""
+    return [Ticker.from_dict(item) for item in items or []]
+
+
+def to_jsonable(value):
+    """Hook `default` do json/msgpack para serializar Tickers"""
+    if isinstance(value, Ticker):
+        return value.to_dict()
+    raise TypeError(f'Objeto do tipo {type(value).__name__} não é serializável em JSON')
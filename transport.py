@@ -0,0 +1,101 @@
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class HTTPTransport:
+    """Transporte HTTP com pool de conexões por host, compartilhado entre threads
+
+    Cada thread usa a sua própria requests.Session (sessões não são
+    thread-safe), mas todas montam o mesmo HTTPAdapter por host, então as
+    conexões keep-alive são reaproveitadas entre fetches e entre ciclos.
+    """
+
+    def __init__(self, pool_size=16, headers=None, retries=2, overrides=None):
+        self.pool_size = pool_size
+        self.headers = dict(headers or {})
+        self.retries = retries
+        self.overrides = dict(overrides or {})  # host (ou '*') -> URL base que o substitui
+        self._adapters = {}
+        self._requests = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _adapter(self, base):
+        with self._lock:
+            adapter = self._adapters.get(base)
+            if adapter is None:
+                # 429/503 e Retry-After ficam com o UpstreamGovernor (orçamento e circuit breaker):
+                # aqui o urllib3 dormiria o Retry-After inteiro, sem limite pelo timeout da requisição
+                retry = Retry(
+                    total=self.retries, connect=self.retries, read=1,
+                    status_forcelist=(502, 504), allowed_methods={'GET'},
+                    backoff_factor=0.3, raise_on_status=False, respect_retry_after_header=False
+                )
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+                self._adapters[base] = adapter
+            return adapter
+
+    def _session(self, base):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            self._local.session = session
+            self._local.mounted = set()
+        if base not in self._local.mounted:
+            session.mount(base, self._adapter(base))
+            self._local.mounted.add(base)
+        return session
+
+    def rewrite(self, url):
+        """Redireciona a URL para o servidor configurado (ex.: stub de benchmark) como base/host/caminho"""
+        parts = urlsplit(url)
+        base = self.overrides.get(parts.netloc) or self.overrides.get('*')
+        if not base:
+            return url
+        query = f'?{parts.query}' if parts.query else ''
+        return f"{base.rstrip('/')}/{parts.netloc}{parts.path}{query}"
+
+    def get(self, url, **kwargs):
+        if self.overrides:
+            url = self.rewrite(url)
+        parts = urlsplit(url)
+        base = f'{parts.scheme}://{parts.netloc}'
+        with self._lock:
+            self._requests[parts.netloc] = self._requests.get(parts.netloc, 0) + 1
+        return self._session(base).get(url, **kwargs)
+
+    def stats(self):
+        """Requisições, conexões abertas e taxa de reutilização de conexões por host"""
+        with self._lock:
+            adapters = dict(self._adapters)
+            requests_by_host = dict(self._requests)
+
+        result = {}
+        for base, adapter in adapters.items():
+            host = urlsplit(base).netloc
+            pools = adapter.poolmanager.pools
+            connections = sum(pools[key].num_connections for key in pools.keys() if key in pools)
+            total = requests_by_host.get(host, 0)
+            result[host] = {
+                'requests': total,
+                'connections_opened': connections,
+                # Retentativas também abrem conexões, por isso o piso em zero
+                'reuse_ratio': round(max(1 - connections / total, 0.0), 3) if total else None,
+                'pool_size': self.pool_size
+            }
+        return result
+
+
+def parse_overrides(value):
+    """'host=url,*=url' -> {host: url}"""
+    overrides = {}
+    for item in value.split(','):
+        host, sep, base = item.strip().partition('=')
+        if sep and host and base:
+            overrides[host.strip()] = base.strip()
+    return overrides
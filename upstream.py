@@ -0,0 +1,243 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+try:
+    import fcntl
+except ImportError:  # Windows: um único processo
+    fcntl = None
+
+
+class UpstreamUnavailable(Exception):
+    """Requisição recusada localmente: circuito aberto ou sem orçamento de rate limit"""
+
+
+class TokenBucket:
+    """Token bucket: `rate` requisições por segundo com rajada de até `capacity`"""
+
+    def __init__(self, rate, capacity, now=None):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic() if now is None else now
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now):
+        """Consome um token; retorna quantos segundos esperar até ele estar disponível"""
+        self._refill(now)
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self):
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class CircuitBreaker:
+    """Circuito por host: abre após falhas consecutivas com backoff exponencial
+
+    Depois do prazo, o circuito fica meio-aberto e deixa passar uma única
+    requisição de teste; sucesso fecha, falha reabre com o dobro do prazo.
+    """
+
+    def __init__(self, threshold=3, base_backoff=30, max_backoff=1800):
+        self.threshold = threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self.open_until = 0.0
+        self.trial_in_flight = False
+
+    def state(self, now):
+        if self.open_until > now:
+            return 'open'
+        if self.failures >= self.threshold or self.open_until:
+            return 'half-open'
+        return 'closed'
+
+    def allow(self, now):
+        state = self.state(now)
+        if state == 'open':
+            return False
+        if state == 'half-open':
+            if self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+        return True
+
+    def success(self):
+        self.failures = 0
+        self.open_until = 0.0
+        self.trial_in_flight = False
+
+    def failure(self, now, retry_after=None):
+        self.failures += 1
+        self.trial_in_flight = False
+        if retry_after is not None or self.failures >= self.threshold:
+            exponent = max(self.failures - self.threshold, 0)
+            backoff = min(self.base_backoff * 2 ** exponent, self.max_backoff)
+            self.open_until = now + max(backoff, retry_after or 0)
+
+
+class UpstreamGovernor:
+    """Rate limit e circuit breaker por host para as chamadas às APIs externas"""
+
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self, limits, default_limit=(5, 10), max_wait=5):
+        self.limits = limits  # host -> (requisições/segundo, rajada)
+        self.default_limit = default_limit
+        self.max_wait = max_wait
+        self._buckets = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def _host_state(self, host):
+        if host not in self._buckets:
+            rate, capacity = self.limits.get(host, self.default_limit)
+            self._buckets[host] = TokenBucket(rate, capacity, self.clock())
+            self._breakers[host] = CircuitBreaker()
+        return self._buckets[host], self._breakers[host]
+
+    @contextmanager
+    def _state(self):
+        """Acesso exclusivo ao estado dos hosts"""
+        with self._lock:
+            yield
+
+    def is_open(self, host):
+        """True se o circuito do host está aberto (chamadas falham imediatamente)"""
+        with self._state():
+            return self._host_state(host)[1].state(self.clock()) == 'open'
+
+    def acquire(self, url):
+        """Reserva permissão para chamar a URL; espera pelo token se necessário"""
+        host = urlsplit(url).hostname
+        with self._state():
+            bucket, breaker = self._host_state(host)
+            now = self.clock()
+            if not breaker.allow(now):
+                raise UpstreamUnavailable(f"Circuito aberto para {host}")
+            wait = bucket.reserve(now)
+            if wait > self.max_wait:
+                bucket.refund()
+                breaker.trial_in_flight = False
+                raise UpstreamUnavailable(f"Rate limit local esgotado para {host}")
+        if wait:
+            time.sleep(wait)
+        return host
+
+    def record(self, host, response=None, error=None):
+        """Registra o resultado da chamada (resposta HTTP ou exceção)"""
+        with self._state():
+            breaker = self._host_state(host)[1]
+            now = self.clock()
+            if error is not None or response.status_code >= 500:
+                breaker.failure(now)
+            elif response.status_code == 429:
+                breaker.failure(now, parse_retry_after(response.headers.get('Retry-After')) or 0)
+            else:
+                breaker.success()
+
+    def status(self):
+        """Estado do circuito e orçamento restante de cada host"""
+        with self._state():
+            now = self.clock()
+            wall = time.time()
+            result = {}
+            for host, bucket in self._buckets.items():
+                breaker = self._breakers[host]
+                bucket._refill(now)
+                result[host] = {
+                    'state': breaker.state(now),
+                    'failures': breaker.failures,
+                    'open_until': wall + breaker.open_until - now if breaker.open_until > now else None,
+                    'tokens': round(max(bucket.tokens, 0), 2),
+                    'capacity': bucket.capacity,
+                    'rate_per_second': bucket.rate
+                }
+            return result
+
+
+class SharedUpstreamGovernor(UpstreamGovernor):
+    """UpstreamGovernor com orçamento e circuito compartilhados entre os workers
+
+    Tokens e estado do circuito de cada host ficam num arquivo JSON lido e
+    regravado sob flock a cada decisão, então os N workers do gunicorn
+    dividem o mesmo orçamento em vez de cada um gastar o seu. Usa o relógio
+    de parede, comum a todos os processos.
+    """
+
+    clock = staticmethod(time.time)
+    TRIAL_TIMEOUT = 60  # Requisição de teste de um worker que morreu não prende o circuito meio-aberto
+
+    def __init__(self, path, limits, **kwargs):
+        super().__init__(limits, **kwargs)
+        self.path = path
+
+    @contextmanager
+    def _state(self):
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            fd = os.open(self.path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                self._load()
+                try:
+                    yield
+                finally:
+                    self._save()
+            finally:
+                os.close(fd)
+
+    def _load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                hosts = json.loads(f.read())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            hosts = {}  # Arquivo corrompido: recomeça com o orçamento cheio
+        now = self.clock()
+        for host, state in hosts.items():
+            bucket, breaker = self._host_state(host)
+            bucket.tokens, bucket.updated = state['tokens'], state['updated']
+            breaker.failures, breaker.open_until = state['failures'], state['open_until']
+            breaker.trial_in_flight = state['trial_until'] > now
+
+    def _save(self):
+        now = self.clock()
+        hosts = {}
+        for host, bucket in self._buckets.items():
+            breaker = self._breakers[host]
+            hosts[host] = {
+                'tokens': bucket.tokens,
+                'updated': bucket.updated,
+                'failures': breaker.failures,
+                'open_until': breaker.open_until,
+                'trial_until': now + self.TRIAL_TIMEOUT if breaker.trial_in_flight else 0
+            }
+        with open(self.path, 'w') as f:
+            f.write(json.dumps(hosts))
+
+
+def parse_retry_after(value):
+    """Retry-After em segundos (aceita número de segundos ou data HTTP)"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None